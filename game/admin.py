@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import HandEvent
+
+
+@admin.register(HandEvent)
+class HandEventAdmin(admin.ModelAdmin):
+    list_display = ("user", "hand_id", "seq", "text", "created_at")
+    list_filter = ("user",)
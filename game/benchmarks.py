@@ -0,0 +1,189 @@
+import copy
+import itertools
+import platform
+import random
+import statistics
+import sys
+import time
+
+from .services import cards, engine, hand_eval, simulation
+from .services import state as state_svc
+
+SEED = 1234
+DEFAULT_TOLERANCE = 0.15  # slower than baseline by more than this fraction = regression
+
+# (label, board size) for the simulator spots.
+STREETS = (("preflop", 0), ("flop", 3), ("turn", 4), ("river", 5))
+OPPONENTS = (1, 2, 4)
+
+
+def measure(fn, calls, setup=None):
+    """
+    Time `calls` individual calls of fn; setup (untimed) runs before each call.
+    Returns per-call timings in microseconds.
+    """
+    timings = []
+    for _ in range(calls):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return {
+        "calls": calls,
+        "median_us": round(statistics.median(timings), 2),
+        "mean_us": round(statistics.fmean(timings), 2),
+        "p95_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "min_us": round(timings[0], 2),
+    }
+
+
+def _cycle(items, fn):
+    source = itertools.cycle(items)
+    return lambda: fn(next(source))
+
+
+def bench_hand_eval(quick=False):
+    rng = random.Random(SEED)
+    calls = 2000 if quick else 20000
+    fives = [rng.sample(range(52), 5) for _ in range(1000)]
+    sevens = [rng.sample(range(52), 7) for _ in range(1000)]
+    sevens_str = [cards.decode(hand) for hand in sevens]
+    hand_eval.evaluate(sevens[0])  # build the lookup tables outside the timings
+    return {
+        "hand_eval.score_five": measure(_cycle(fives, hand_eval.score_five), calls),
+        "hand_eval.evaluate_best[7 ints]": measure(_cycle(sevens, hand_eval.evaluate_best), calls),
+        "hand_eval.evaluate_best[7 strings]": measure(_cycle(sevens_str, hand_eval.evaluate_best), calls),
+    }
+
+
+def bench_simulation(quick=False, iterations=2000):
+    rng = random.Random(SEED)
+    calls = 3 if quick else 15
+    results = {}
+    for street, board_size in STREETS:
+        for opponents in OPPONENTS:
+            spots = []
+            for _ in range(calls):
+                dealt = rng.sample(range(52), 2 + board_size)
+                spots.append((dealt[:2], dealt[2:]))
+            # The preflop table and exact enumeration (small turn/river spots) would
+            # replace sampling; these rows time `iterations` Monte Carlo iterations.
+            run = _cycle(
+                spots,
+                lambda spot, opponents=opponents: simulation.estimate_win_prob(
+                    spot[0], spot[1], opponents, iterations=iterations, exact_cap=0, preflop_table=False
+                ),
+            )
+            results[f"simulation.estimate_win_prob[{street},{opponents}opp,{iterations}it]"] = measure(run, calls)
+    return results
+
+
+def bench_engine(quick=False):
+    random.seed(SEED)
+    calls = 5 if quick else 30
+    fresh = []
+    for _ in range(calls):
+        state = state_svc.new_hand()
+        engine.maybe_opening_bots(state)
+        fresh.append(state)
+    pending = []
+
+    def setup():
+        pending.append(copy.deepcopy(fresh[len(pending) % len(fresh)]))
+
+    return {
+        "engine.apply_player_move[call]": measure(lambda: engine.apply_player_move(pending[-1], "call"), calls, setup)
+    }
+
+
+def bench_http(quick=False):
+    """Django test client against a throwaway test database."""
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    calls = 5 if quick else 25
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        user = get_user_model().objects.create_user("benchmark", password="benchmark-pass")
+        client = Client()
+        client.force_login(user)
+        random.seed(SEED)
+
+        def fresh_hand():
+            client.get("/play/new/")
+
+        results = {
+            "http.GET /play/action/call/": measure(
+                lambda: client.get("/play/action/call/", HTTP_X_REQUESTED_WITH="XMLHttpRequest"),
+                calls,
+                fresh_hand,
+            ),
+            # Includes the LLM round-trip, so it tracks OLLAMA_ENDPOINT as configured.
+            "http.GET /ai-tip/": measure(lambda: client.get("/ai-tip/"), calls, fresh_hand),
+        }
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+    return results
+
+
+SUITES = {
+    "hand_eval": bench_hand_eval,
+    "simulation": bench_simulation,
+    "engine": bench_engine,
+    "http": bench_http,
+}
+
+
+def run(suites=None, quick=False):
+    """Run the named suites (all by default) and return a JSON-ready report."""
+    results = {}
+    for name in suites or SUITES:
+        results.update(SUITES[name](quick=quick))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": simulation.HAS_NUMPY,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare median timings against a baseline report. Returns one row per benchmark
+    in the report with status "regression", "improved", "ok" or "new" (not in the baseline).
+    """
+    previous = baseline.get("results", {})
+    rows = []
+    for name, now in sorted(report.get("results", {}).items()):
+        before = previous.get(name)
+        if before is None:
+            rows.append({"name": name, "status": "new"})
+            continue
+        ratio = now["median_us"] / before["median_us"] if before["median_us"] else 1.0
+        if ratio > 1 + tolerance:
+            status = "regression"
+        elif ratio < 1 - tolerance:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "name": name,
+                "baseline_us": before["median_us"],
+                "current_us": now["median_us"],
+                "ratio": round(ratio, 3),
+                "status": status,
+            }
+        )
+    return rows
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Benchmark the evaluator, simulator, engine and request path; optionally compare with a baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--suite",
+            action="append",
+            choices=sorted(benchmarks.SUITES),
+            help="Suite to run (repeatable; default all).",
+        )
+        parser.add_argument("--quick", action="store_true", help="Fewer calls per benchmark, for a smoke run.")
+        parser.add_argument("--output", help="Write the JSON report here (use it later as a --baseline).")
+        parser.add_argument("--baseline", help="Earlier JSON report to compare median timings against.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=benchmarks.DEFAULT_TOLERANCE,
+            help="Allowed slowdown as a fraction of the baseline before flagging a regression.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            path = Path(options["baseline"])
+            if not path.exists():
+                raise CommandError(f"Baseline {path} not found.")
+            baseline = json.loads(path.read_text())
+
+        report = benchmarks.run(options["suite"], quick=options["quick"])
+        for name, result in report["results"].items():
+            self.stdout.write(f"{name:<60} median {result['median_us']:>12.1f}us  p95 {result['p95_us']:>12.1f}us")
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if baseline is None:
+            return
+        rows = benchmarks.compare(report, baseline, tolerance=options["tolerance"])
+        for row in rows:
+            if "ratio" not in row:
+                self.stdout.write(f"{row['name']:<60} {row['status']}")
+                continue
+            line = f"{row['name']:<60} {row['baseline_us']:>12.1f} -> {row['current_us']:>12.1f}us  x{row['ratio']}"
+            style = {"regression": self.style.ERROR, "improved": self.style.SUCCESS}.get(row["status"])
+            self.stdout.write(style(f"{line}  {row['status']}") if style else f"{line}  {row['status']}")
+        regressions = [row["name"] for row in rows if row["status"] == "regression"]
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed beyond {options['tolerance']:.0%}.")
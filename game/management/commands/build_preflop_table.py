@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from game.services import preflop, simulation, state
+
+
+class Command(BaseCommand):
+    help = "Regenerate the preflop equity table (169 starting hands x opponent count)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200000, help="Monte Carlo iterations per cell.")
+        parser.add_argument(
+            "--max-opponents", type=int, default=state.DEFAULT_BOTS, help="Tabulate 1..N random opponents."
+        )
+        parser.add_argument("--output", default=str(preflop.TABLE_PATH), help="Where to write the JSON table.")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        max_opponents = options["max_opponents"]
+        started = time.perf_counter()
+        equity = {}
+        for name, hole in preflop.starting_hands():
+            equity[name] = [
+                round(
+                    simulation.estimate_win_prob(
+                        hole, [], num_opponents=opponents, iterations=iterations, preflop_table=False
+                    ),
+                    4,
+                )
+                for opponents in range(1, max_opponents + 1)
+            ]
+            self.stdout.write(f"{name}: {equity[name]}")
+        preflop.write_table(equity, iterations, path=options["output"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(equity)} hands to {options['output']} in {elapsed:.1f}s."))
@@ -0,0 +1,94 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+DEFAULT_REPLY = "Call here: the pot odds cover your draw."
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate (streamed NDJSON or one JSON body) and /api/tags like Ollama."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, chunked streaming
+    reply = DEFAULT_REPLY
+    delay = 0.0  # seconds before the first token
+    token_delay = 0.0  # seconds between streamed tokens
+    quiet = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, payload):
+        line = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "fake:latest"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path != "/api/generate":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        time.sleep(self.delay)
+        model = body.get("model", "fake")
+        if not body.get("stream", True):
+            self._send_json({"model": model, "response": self.reply, "done": True})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = self.reply.split(" ")
+        for idx, word in enumerate(words):
+            self._chunk({"model": model, "response": word if idx == 0 else " " + word, "done": False})
+            time.sleep(self.token_delay)
+        self._chunk({"model": model, "response": "", "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class Command(BaseCommand):
+    help = "Run a stand-in Ollama server with a canned tip, for local testing and benchmarks without a model."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=11434, help="Port to listen on (Ollama's is 11434).")
+        parser.add_argument("--reply", default=DEFAULT_REPLY, help="Tip text to answer every prompt with.")
+        parser.add_argument("--delay", type=float, default=0.5, help="Seconds before the first token.")
+        parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed tokens.")
+        parser.add_argument("--verbose", action="store_true", help="Log each request.")
+
+    def handle(self, *args, **options):
+        handler = type(
+            "Handler",
+            (FakeOllamaHandler,),
+            {
+                "reply": options["reply"],
+                "delay": options["delay"],
+                "token_delay": options["token_delay"],
+                "quiet": not options["verbose"],
+            },
+        )
+        server = ThreadingHTTPServer(("127.0.0.1", options["port"]), handler)
+        self.stdout.write(
+            self.style.SUCCESS(f"Fake Ollama on http://127.0.0.1:{options['port']}/api/generate (Ctrl+C to stop)")
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from game.services import selfplay
+
+
+class Command(BaseCommand):
+    help = "Play hands headlessly (no HTTP) and report throughput, chip EV per seat and bot action frequencies."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hands", type=int, default=200, help="Total hands to play.")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes to split the hands across.")
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Seed for reproducible runs: deals and equity sampling (time budgets are ignored).",
+        )
+        parser.add_argument(
+            "--hero", choices=sorted(selfplay.HERO_POLICIES), default="advice", help="Scripted hero policy."
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        report = selfplay.run(options["hands"], workers=options["workers"], seed=options["seed"], hero=options["hero"])
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report['hands']} hands in {report['seconds']}s ({report['hands_per_sec']} hands/sec, "
+                f"{options['workers']} worker(s))"
+            )
+        )
+        if report["unfinished"]:
+            self.stdout.write(self.style.WARNING(f"{report['unfinished']} hands hit the move cap."))
+        self.stdout.write("Chip EV per hand:")
+        for name, ev in report["chip_ev"].items():
+            self.stdout.write(f"  {name:<6} {ev:+.2f}")
+        self.stdout.write("Bot action frequencies:")
+        for name, freq in report["bot_actions"].items():
+            mix = ", ".join(f"{action} {share:.0%}" for action, share in freq.items() if action != "decisions")
+            self.stdout.write(f"  {name:<6} {mix} ({freq['decisions']} decisions)")
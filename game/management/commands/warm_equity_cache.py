@@ -0,0 +1,42 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from game.services import cards, engine, equity_cache, preflop, simulation, state
+
+
+class Command(BaseCommand):
+    help = "Pre-populate the equity cache with common starting hands on a spread of flop textures."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hands", type=int, default=30, help="Strongest N starting hands (by heads-up equity).")
+        parser.add_argument("--flops", type=int, default=50, help="Random flops per starting hand.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for reproducible flop selection.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        table = preflop.load_table().get("equity", {})
+        ranked = sorted(preflop.starting_hands(), key=lambda item: -(table.get(item[0]) or [0])[0])
+        cache = equity_cache.get_cache()
+        # The keys gameplay reads: engine.street_equity (simulation.multi_seat_equity) and
+        # views._tip_inputs (cached_equity) both look up spot_key(spot, ADVICE_ITERATIONS),
+        # the hero against 1..DEFAULT_BOTS live bots and each bot against one hand.
+        targets = [(opponents, engine.ADVICE_ITERATIONS) for opponents in range(1, state.DEFAULT_BOTS + 1)]
+
+        started = time.perf_counter()
+        before = cache.stats()
+        for name, hole in ranked[: options["hands"]]:
+            unseen = cards.remaining_deck(hole)
+            for _ in range(options["flops"]):
+                flop = rng.sample(unseen, 3)
+                for opponents, iterations in targets:
+                    simulation.cached_equity(hole, flop, opponents, iterations)
+            self.stdout.write(f"{name}: done")
+        elapsed = time.perf_counter() - started
+        stats = cache.stats()
+        computed = stats["misses"] - before["misses"]
+        skipped = stats["hits"] - before["hits"]
+        self.stdout.write(
+            self.style.SUCCESS(f"Warmed {computed} spots ({skipped} already cached) in {elapsed:.1f}s: {stats}")
+        )
@@ -0,0 +1,67 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .services import timing
+
+logger = logging.getLogger("game.timing")
+
+
+class TimingMiddleware:
+    """
+    Collect services.timing spans for each request and report them as a Server-Timing
+    header, plus one JSON log line per request when PERF_TIMING_LOG is on.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PERF_TIMING", False)
+        self.log = getattr(settings, "PERF_TIMING_LOG", False)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        token = timing.start()
+        try:
+            with timing.span("total"):
+                response = self.get_response(request)
+        finally:
+            spans = timing.finish(token)
+        return self._report(request, response, spans)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        token = timing.start()
+        try:
+            with timing.span("total"):
+                response = await self.get_response(request)
+        finally:
+            spans = timing.finish(token)
+        return self._report(request, response, spans)
+
+    def _report(self, request, response, spans):
+        response["Server-Timing"] = timing.server_timing(spans)
+        if self.log:
+            logger.info(
+                json.dumps(
+                    {
+                        "event": "request_timing",
+                        "method": request.method,
+                        "path": request.path,
+                        "status": response.status_code,
+                        "spans": {name: {"ms": total, "count": count} for name, (total, count) in spans.items()},
+                    }
+                )
+            )
+        return response
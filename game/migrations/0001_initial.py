@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HandEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hand_id', models.BigIntegerField()),
+                ('seq', models.PositiveIntegerField()),
+                ('text', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hand_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['hand_id', 'seq'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'hand_id', 'seq'), name='unique_hand_event')],
+            },
+        ),
+    ]
@@ -1,3 +1,19 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class HandEvent(models.Model):
+    """One hand-log line, appended in batches by services.history.flush (never updated)."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="hand_events")
+    hand_id = models.BigIntegerField()
+    seq = models.PositiveIntegerField()
+    text = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["hand_id", "seq"]
+        constraints = [models.UniqueConstraint(fields=["user", "hand_id", "seq"], name="unique_hand_event")]
+
+    def __str__(self):
+        return f"{self.hand_id}#{self.seq}: {self.text}"
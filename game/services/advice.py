@@ -1,5 +1,8 @@
+from . import hand_eval
+
+
 def hand_rank_label(score):
-    rank_idx = score[0] if score else -1
+    rank_idx = hand_eval.score_category(score)
     labels = [
         "high card",
         "pair",
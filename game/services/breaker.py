@@ -0,0 +1,134 @@
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+
+DEFAULT_THRESHOLD = 3  # consecutive failures before the circuit opens
+DEFAULT_BACKOFF = 5.0  # seconds open before the first probe; doubles per failed probe
+DEFAULT_MAX_BACKOFF = 300.0
+DEFAULT_PROBE_TIMEOUT = 1.0
+
+# Per-process counters for stats(); the breaker state itself lives in the cache so
+# every worker sharing LLM_BREAKER_CACHE sees the same circuit.
+_counts = Counter()  # rejected / probes / probe_failures / opened / closed
+_counts_lock = threading.Lock()
+_endpoints = set()
+
+
+def _settings():
+    from django.conf import settings
+
+    return {
+        "alias": getattr(settings, "LLM_BREAKER_CACHE", "default"),
+        "threshold": getattr(settings, "LLM_BREAKER_THRESHOLD", DEFAULT_THRESHOLD),
+        "backoff": getattr(settings, "LLM_BREAKER_BACKOFF", DEFAULT_BACKOFF),
+        "max_backoff": getattr(settings, "LLM_BREAKER_MAX_BACKOFF", DEFAULT_MAX_BACKOFF),
+        "probe_timeout": getattr(settings, "LLM_BREAKER_PROBE_TIMEOUT", DEFAULT_PROBE_TIMEOUT),
+    }
+
+
+def _cache(config):
+    from django.core.cache import caches
+
+    return caches[config["alias"]]
+
+
+def _count(name):
+    with _counts_lock:
+        _counts[name] += 1
+
+
+def _key(endpoint):
+    return f"llm-breaker:{endpoint}"
+
+
+def _closed():
+    return {"state": "closed", "failures": 0, "backoff": 0.0, "retry_at": 0.0}
+
+
+def _load(cache, endpoint):
+    _endpoints.add(endpoint)
+    return cache.get(_key(endpoint)) or _closed()
+
+
+def probe_url(endpoint):
+    """Ollama's cheap model-list endpoint on the same server as the generate endpoint."""
+    parts = urllib.parse.urlsplit(endpoint)
+    return urllib.parse.urlunsplit((parts.scheme, parts.netloc, "/api/tags", "", ""))
+
+
+def probe(endpoint, timeout=DEFAULT_PROBE_TIMEOUT):
+    """True if the server answers GET /api/tags with 200 within timeout."""
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    try:
+        with opener.open(probe_url(endpoint), timeout=timeout) as resp:
+            return resp.status == 200
+    except (urllib.error.URLError, TimeoutError, ConnectionError, OSError):
+        return False
+
+
+def allow(endpoint):
+    """
+    Whether a call to endpoint may go out. Closed: yes. Open: no until the backoff
+    has passed; then one worker (cache.add lock) probes the server, closing the
+    circuit if it answers or doubling the backoff if not.
+    """
+    config = _settings()
+    cache = _cache(config)
+    status = _load(cache, endpoint)
+    if status["state"] == "closed":
+        return True
+    now = time.time()
+    if now < status["retry_at"] or not cache.add(_key(endpoint) + ":probe", 1, timeout=config["probe_timeout"] + 1):
+        _count("rejected")
+        return False
+    _count("probes")
+    if probe(endpoint, timeout=config["probe_timeout"]):
+        cache.set(_key(endpoint), _closed(), timeout=None)
+        _count("closed")
+        return True
+    _count("probe_failures")
+    _count("rejected")
+    backoff = min(config["max_backoff"], status["backoff"] * 2)
+    cache.set(_key(endpoint), dict(status, backoff=backoff, retry_at=now + backoff), timeout=None)
+    return False
+
+
+def record_success(endpoint):
+    config = _settings()
+    cache = _cache(config)
+    if _load(cache, endpoint) != _closed():
+        cache.set(_key(endpoint), _closed(), timeout=None)
+
+
+def record_failure(endpoint):
+    """Count a failed call; the threshold-th consecutive failure opens the circuit."""
+    config = _settings()
+    cache = _cache(config)
+    status = _load(cache, endpoint)
+    status["failures"] += 1
+    if status["state"] == "closed" and status["failures"] >= config["threshold"]:
+        status.update(state="open", backoff=config["backoff"], retry_at=time.time() + config["backoff"])
+        _count("opened")
+    cache.set(_key(endpoint), status, timeout=None)
+
+
+def stats():
+    """Circuit state per endpoint seen by this process, plus this process's counters."""
+    config = _settings()
+    cache = _cache(config)
+    now = time.time()
+    circuits = {}
+    for endpoint in sorted(_endpoints):
+        status = _load(cache, endpoint)
+        circuits[endpoint] = {
+            "state": status["state"],
+            "failures": status["failures"],
+            "backoff": status["backoff"],
+            "retry_in": max(0, round(status["retry_at"] - now, 1)) if status["state"] == "open" else 0,
+        }
+    with _counts_lock:
+        counts = dict(_counts)
+    return {"circuits": circuits, **counts}
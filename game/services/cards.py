@@ -1,12 +1,20 @@
+import functools
 import random
 
 RANKS = "23456789TJQKA"
 SUITS = "SHDC"
 
+# Cards are ints internally: card = rank_index * 4 + suit_index (0-51), so "2S" is 0
+# and "AC" is 51. Sets of cards are 64-bit masks with bit `card` set. Strings like
+# "AS" only appear at the session/JSON boundary (see encode/decode).
+CARD_NAMES = [r + s for r in RANKS for s in SUITS]
+CARD_INDEX = {name: idx for idx, name in enumerate(CARD_NAMES)}
+FULL_MASK = (1 << 52) - 1
+
 
 def new_deck():
     """Return a freshly ordered deck."""
-    return [r + s for r in RANKS for s in SUITS]
+    return list(range(52))
 
 
 def shuffle(deck):
@@ -14,16 +22,88 @@ def shuffle(deck):
     return deck
 
 
+def seeded_deck(seed=None):
+    """
+    A shuffled deck stored as {"seed", "cursor"}: the card order is derived from the
+    seed (see deck_order), so a game's deck is two ints and replays exactly.
+    """
+    if seed is None:
+        seed = random.getrandbits(63)
+    return {"seed": seed, "cursor": 0}
+
+
+@functools.lru_cache(maxsize=256)
+def deck_order(seed):
+    order = list(range(52))
+    random.Random(seed).shuffle(order)
+    return tuple(order)
+
+
 def remaining_deck(excluded):
-    excluded_set = set(excluded)
-    return [card for card in new_deck() if card not in excluded_set]
+    excluded_mask = mask_of(excluded)
+    return [card for card in range(52) if not excluded_mask >> card & 1]
 
 
 def draw(deck, count):
+    """Take the next count cards from a deck list (in place) or a seeded deck (advances its cursor)."""
+    if isinstance(deck, dict):
+        cursor = deck["cursor"]
+        deck["cursor"] = min(52, cursor + count)
+        return list(deck_order(deck["seed"])[cursor : deck["cursor"]])
     drawn = deck[:count]
     del deck[:count]
     return drawn
 
 
+def cards_left(deck):
+    if isinstance(deck, dict):
+        return 52 - deck["cursor"]
+    return len(deck)
+
+
+def undealt(deck):
+    """Cards still in a deck list or seeded deck, as ints."""
+    if isinstance(deck, dict):
+        return remaining_deck(deck_order(deck["seed"])[: deck["cursor"]])
+    return encode(deck)
+
+
+def to_int(card):
+    """Return the 0-51 integer for a card given as "AS" or already as an int."""
+    return card if isinstance(card, int) else CARD_INDEX[card]
+
+
+def to_str(card):
+    """Return the two-char name ("AS") for a card given as an int or string."""
+    return CARD_NAMES[card] if isinstance(card, int) else card
+
+
+def encode(cards):
+    return [to_int(card) for card in cards]
+
+
+def decode(cards):
+    return [to_str(card) for card in cards]
+
+
+def rank_of(card):
+    return card >> 2
+
+
+def suit_of(card):
+    return card & 3
+
+
+def mask_of(cards):
+    mask = 0
+    for card in cards:
+        mask |= 1 << to_int(card)
+    return mask
+
+
+def cards_in_mask(mask):
+    return [card for card in range(52) if mask >> card & 1]
+
+
 def describe_cards(cards):
-    return " ".join(cards)
+    return " ".join(decode(cards))
@@ -0,0 +1,63 @@
+# JSON patches between two client views of the state (see state.to_client), applied
+# by static/game/app.js. Merge-patch style: a dict patch updates the keys it names
+# and null removes a key (the client treats missing and null alike). Two list forms
+# keep common changes small:
+#   {"$append": [...]}          the list only grew (board cards)
+#   {"$items": {"1": {...}}}    same length, patch the listed indexes (bots)
+# and {"$replace": ...} swaps in a dict wholesale where there was none before, or sets
+# a key that is still present to null (a bare null would remove it).
+
+
+def diff(old, new):
+    """Patch turning dict old into dict new, or {} when nothing changed."""
+    patch = {}
+    for key in old.keys() - new.keys():
+        patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = _wrap(value)
+            continue
+        change = _diff_value(old[key], value)
+        if change is not _SAME:
+            patch[key] = change
+    return patch
+
+
+_SAME = object()
+
+
+def _wrap(value):
+    return {"$replace": value} if value is None or isinstance(value, dict) else value
+
+
+def _diff_value(old, new):
+    if old == new:
+        return _SAME
+    if isinstance(old, dict) and isinstance(new, dict):
+        return diff(old, new)
+    if isinstance(old, list) and isinstance(new, list):
+        if len(new) > len(old) and new[: len(old)] == old:
+            return {"$append": new[len(old) :]}
+        if len(new) == len(old) and all(isinstance(item, dict) for item in old + new):
+            return {"$items": {str(idx): diff(a, b) for idx, (a, b) in enumerate(zip(old, new)) if a != b}}
+    return _wrap(new)
+
+
+def apply(doc, patch):
+    """Python twin of app.js applyPatch(); returns doc updated in place."""
+    for key, value in patch.items():
+        if value is None:
+            doc.pop(key, None)
+        elif isinstance(value, dict) and "$replace" in value:
+            doc[key] = value["$replace"]
+        elif isinstance(value, dict) and "$append" in value:
+            doc[key] = list(doc.get(key) or []) + value["$append"]
+        elif isinstance(value, dict) and "$items" in value:
+            items = doc[key]
+            for idx, item_patch in value["$items"].items():
+                apply(items[int(idx)], item_patch)
+        elif isinstance(value, dict):
+            apply(doc.setdefault(key, {}), value)
+        else:
+            doc[key] = value
+    return doc
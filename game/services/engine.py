@@ -1,30 +1,77 @@
-from . import cards, hand_eval, simulation, advice, policy
+from . import cards, hand_state, simulation, advice, policy, timing, tip_prefetch
 
 CALL_AMOUNT = 10
 RAISE_AMOUNT = 20
-ADVICE_ITERATIONS = 350
+# The numpy batch sampler runs tens of thousands of iterations in the time the
+# pure Python loop needs for a few hundred.
+ADVICE_ITERATIONS = 20000 if simulation.HAS_NUMPY else 350
+# Wall-clock caps so an action's latency does not depend on host speed or table size.
+# STREET_BUDGET_MS covers the shared all-seat pass (street_equity); ADVICE_BUDGET_MS a
+# single hero estimate outside it.
+ADVICE_BUDGET_MS = 150
+STREET_BUDGET_MS = 300
+# Equity cut-offs. Sampling stops early once the estimate is clearly on one side of
+# every cut-off that matters for the decision (see simulation.adaptive_win_prob).
+ADVICE_THRESHOLDS = (0.45, 0.7)  # advice.suggest / policy.recommend
+BOT_ALLIN_CALL_THRESHOLD = 0.35
+BOT_CALL_THRESHOLD = 0.4
+BOT_RAISE_THRESHOLD = 0.65
+BOT_SHOVE_THRESHOLD = 0.8
+BOT_THRESHOLDS = (BOT_ALLIN_CALL_THRESHOLD, BOT_CALL_THRESHOLD, BOT_RAISE_THRESHOLD, BOT_SHOVE_THRESHOLD)
+
+
+@timing.timed("engine.street_equity")
+def street_equity(state):
+    """
+    Equity for the hero and every live bot from one shared simulation
+    (simulation.multi_seat_equity). Memoized in state["street_equity"] until the
+    board or the number of live bots changes, so bots_act and ensure_advice on the
+    same street reuse one pass. The hero plays all live bots; each bot is rated
+    heads-up against one random hand.
+    """
+    active_bots = sum(1 for bot in state["bots"] if not bot.get("folded"))
+    key = [len(state["community"]), active_bots]
+    memo = state.get("street_equity")
+    if memo and memo.get("key") == key:
+        return memo
+
+    seats = []
+    hero_in = not state["player"].get("folded")
+    if hero_in:
+        seats.append((state["player"]["hand"], active_bots, ADVICE_THRESHOLDS))
+    live = [idx for idx, bot in enumerate(state["bots"]) if not bot.get("folded")]
+    seats.extend((state["bots"][idx]["hand"], 1, BOT_THRESHOLDS) for idx in live)
+    estimates = simulation.multi_seat_equity(
+        seats,
+        state["community"],
+        iterations=ADVICE_ITERATIONS,
+        budget_ms=STREET_BUDGET_MS,
+    )
+    bot_equity = [None] * len(state["bots"])
+    for idx, estimate in zip(live, estimates[1:] if hero_in else estimates):
+        bot_equity[idx] = estimate["win_prob"]
+    memo = {"key": key, "hero": estimates[0] if hero_in else None, "bots": bot_equity}
+    state["street_equity"] = memo
+    return memo
 
 
+@timing.timed("engine.ensure_advice")
 def ensure_advice(state):
     if state.get("street") == "hand_over" or state["player"].get("folded"):
         state["last_advice"] = None
         return
 
     active_bots = sum(1 for bot in state["bots"] if not bot.get("folded"))
-    best_score = hand_eval.evaluate_best(state["player"]["hand"] + state["community"])
+    best_score = hand_state.for_seat(state["player"], state["community"]).best
     hand_label = advice.hand_rank_label(best_score)
-    win_prob = simulation.estimate_win_prob(
-        state["player"]["hand"],
-        state["community"],
-        num_opponents=active_bots,
-        iterations=ADVICE_ITERATIONS,
-        deck=state["deck"],
-    )
+    estimate = street_equity(state)["hero"]
+    win_prob = estimate["win_prob"]
     pending = state.get("pending_call", 0) or CALL_AMOUNT
     to_call = min(pending, state["player"]["stack"])
     policy_hint = policy.recommend(state, win_prob)
     prev_ai = state.get("last_advice", {}).get("ai_note") if state.get("last_advice") else None
     state["last_equity"] = win_prob
+    state["last_equity_samples"] = estimate["samples"]
     state["last_policy"] = policy_hint
     state["last_advice"] = advice.suggest(
         win_prob,
@@ -38,8 +85,11 @@ def ensure_advice(state):
         # Always request a fresh AI tip for the current spot; frontend will fetch asynchronously.
         ai_note="AI tip pending...",
     )
+    # Start the LLM call now so /ai-tip/ usually only has to collect the result.
+    tip_prefetch.submit(state, win_prob, policy_hint)
 
 
+@timing.timed("engine.apply_player_move")
 def apply_player_move(state, move):
     events = []
     player = state["player"]
@@ -78,6 +128,8 @@ def apply_player_move(state, move):
         state["pot"] += bet
         state["pending_call"] = RAISE_AMOUNT
         state["raise_done"] = True
+        if player["stack"] == 0:
+            player["all_in"] = True
         msg = f"You raise {bet}."
     elif move == "call":
         due = pending if pending else CALL_AMOUNT
@@ -121,12 +173,14 @@ def apply_player_move(state, move):
     return state, events
 
 
+@timing.timed("engine.bots_act")
 def bots_act(state):
     events = []
     pending = state.get("pending_call", 0)
     raise_allowed = not state.get("raise_done", False)
     player_all_in = state.get("player", {}).get("all_in", False)
-    for bot in state["bots"]:
+    equity = street_equity(state)["bots"]
+    for idx, bot in enumerate(state["bots"]):
         if bot.get("folded"):
             continue
 
@@ -136,13 +190,11 @@ def bots_act(state):
             state["log"].append(action)
             continue
 
-        bot_prob = simulation.estimate_win_prob(
-            bot["hand"], state["community"], num_opponents=1, iterations=200, deck=state["deck"]
-        )
+        bot_prob = equity[idx]
 
         if player_all_in:
             # When hero is all-in, each bot either calls all-in or folds.
-            if bot_prob >= 0.35:
+            if bot_prob >= BOT_ALLIN_CALL_THRESHOLD:
                 bet = bot["stack"]
                 bot["stack"] = 0
                 state["pot"] += bet
@@ -155,21 +207,21 @@ def bots_act(state):
             continue
 
         # High confidence shove: go all-in to pressure the player.
-        if raise_allowed and bot_prob >= 0.8:
+        if raise_allowed and bot_prob >= BOT_SHOVE_THRESHOLD:
             bet = bot["stack"]
             bot["stack"] = 0
             state["pot"] += bet
             state["pending_call"] = max(state.get("pending_call", 0), bet)
             state["raise_done"] = True
             action = f"{bot['name']} goes all-in for {bet}."
-        elif raise_allowed and pending == 0 and bot_prob >= 0.65:
+        elif raise_allowed and pending == 0 and bot_prob >= BOT_RAISE_THRESHOLD:
             bet = min(RAISE_AMOUNT, bot["stack"])
             bot["stack"] -= bet
             state["pot"] += bet
             state["pending_call"] = bet  # player must call this raise
             state["raise_done"] = True
             action = f"{bot['name']} raises {bet}."
-        elif bot_prob >= 0.4:
+        elif bot_prob >= BOT_CALL_THRESHOLD:
             bet = min(pending if pending else CALL_AMOUNT, bot["stack"])
             bot["stack"] -= bet
             state["pot"] += bet
@@ -183,34 +235,42 @@ def bots_act(state):
     return events
 
 
+def deal_board(state, count):
+    """Draw count board cards and extend every seat's stored hand state with them."""
+    new_cards = cards.draw(state["deck"], count)
+    hand_state.extend_seats([state["player"]] + state["bots"], state["community"], new_cards)
+    state["community"].extend(new_cards)
+    return new_cards
+
+
 def advance_board(state, events):
-    deck = state["deck"]
     street = state["street"]
     state["pending_call"] = 0
     state["raise_done"] = False
     state["player"]["all_in"] = False
 
     if street == "preflop":
-        state["community"].extend(cards.draw(deck, 3))
+        deal_board(state, 3)
         state["street"] = "flop"
         events.append("Flop dealt.")
     elif street == "flop":
-        state["community"].extend(cards.draw(deck, 1))
+        deal_board(state, 1)
         state["street"] = "turn"
         events.append("Turn dealt.")
     elif street == "turn":
-        state["community"].extend(cards.draw(deck, 1))
+        deal_board(state, 1)
         state["street"] = "river"
         events.append("River dealt.")
 
 
+@timing.timed("engine.showdown")
 def showdown(state, events):
     active = []
     if not state["player"].get("folded"):
-        active.append(("You", state["player"]["hand"]))
+        active.append(("You", state["player"]))
     for bot in state["bots"]:
         if not bot.get("folded"):
-            active.append((bot["name"], bot["hand"]))
+            active.append((bot["name"], bot))
 
     if not active:
         msg = "Everyone folded. Hand over."
@@ -220,7 +280,7 @@ def showdown(state, events):
         return
 
     board = state["community"]
-    scored = [(name, hand, hand_eval.evaluate_best(hand + board)) for name, hand in active]
+    scored = [(name, seat["hand"], hand_state.for_seat(seat, board).best) for name, seat in active]
     best_score = max(score for _, _, score in scored)
     winners = [name for name, _, score in scored if score == best_score]
 
@@ -251,7 +311,7 @@ def showdown(state, events):
     # Explain best hands
     for name, hand, score in scored:
         label = advice.hand_rank_label(score)
-        hand_str = " ".join(hand)
+        hand_str = cards.describe_cards(hand)
         detail = f"{name} shows {hand_str} ({label})."
         events.append(detail)
         state["log"].append(detail)
@@ -284,9 +344,8 @@ def award_uncontested(state, events):
 
 
 def deal_remaining_board(state, events):
-    deck = state["deck"]
-    while len(state["community"]) < 5 and deck:
-        state["community"].extend(cards.draw(deck, 1))
+    while len(state["community"]) < 5 and cards.cards_left(state["deck"]):
+        deal_board(state, 1)
     if len(state["community"]) == 5:
         state["street"] = "river"
     state["pending_call"] = 0
@@ -0,0 +1,186 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+from . import cards
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 3600  # seconds
+# Bump when evaluator or sampler changes would make stored equities wrong.
+KEY_VERSION = 2
+
+_SUIT_PERMUTATIONS = list(itertools.permutations(range(4)))
+
+
+def canonical_spot(hole, board, num_opponents):
+    """
+    Key for an equity spot that is identical for every suit relabelling of it,
+    e.g. AS KS on QS JH 2D and AH KH on QH JS 2C map to the same key.
+    """
+    hole = cards.encode(hole)
+    board = cards.encode(board)
+    best = None
+    for perm in _SUIT_PERMUTATIONS:
+        mapped = (
+            tuple(sorted((card & ~3) | perm[card & 3] for card in hole)),
+            tuple(sorted((card & ~3) | perm[card & 3] for card in board)),
+        )
+        if best is None or mapped < best:
+            best = mapped
+    return (num_opponents,) + best
+
+
+def spot_key(spot, iterations):
+    """Compact versioned string key, e.g. "eq2:2:3033:2c1e0a:20000" (cards as two hex digits)."""
+    num_opponents, hole, board = spot
+    hole_hex = "".join(f"{card:02x}" for card in hole)
+    board_hex = "".join(f"{card:02x}" for card in board)
+    return f"eq{KEY_VERSION}:{num_opponents}:{hole_hex}:{board_hex}:{iterations}"
+
+
+class LRUCache:
+    """Thread-safe bounded LRU with a per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_many(self, items):
+        for key, value in items.items():
+            self.set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
+
+
+class DjangoCacheBackend:
+    """
+    Equity cache shared by every worker through a django.core.cache alias
+    (locmem, file-based, memcached or redis; see settings.EQUITY_CACHE_URL).
+    A small per-process LRU in front saves a round-trip on repeated spots.
+    """
+
+    def __init__(self, alias="equity", ttl=DEFAULT_TTL, local_entries=2048):
+        self.alias = alias
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.local = LRUCache(max_entries=local_entries, ttl=min(ttl, 60))
+        self._lock = threading.Lock()  # guards the counters
+
+    @property
+    def shared(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return default if value is None else value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        self.shared.set(key, value, timeout=self.ttl)
+
+    def set_many(self, items):
+        for key, value in items.items():
+            self.local.set(key, value)
+        self.shared.set_many(items, timeout=self.ttl)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "backend": f"django:{self.alias}",
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "local": self.local.stats(),
+            "ttl": self.ttl,
+        }
+
+
+# Per-process fallback when no shared backend is configured.
+memory_cache = LRUCache()
+_backend = None
+
+
+def get_cache():
+    """
+    Cache used by simulation.cached_win_prob(). settings.EQUITY_CACHE_BACKEND names
+    a CACHES alias to share results across workers, or "memory" for the per-process LRU.
+    """
+    global _backend
+    if _backend is None:
+        from django.conf import settings
+
+        alias = getattr(settings, "EQUITY_CACHE_BACKEND", "memory") if settings.configured else "memory"
+        if alias == "memory":
+            _backend = memory_cache
+        else:
+            _backend = DjangoCacheBackend(alias, ttl=getattr(settings, "EQUITY_CACHE_TTL", DEFAULT_TTL))
+    return _backend
+
+
+def set_cache(backend):
+    """Swap the active backend (None re-reads settings on next use)."""
+    global _backend
+    _backend = backend
@@ -1,14 +1,34 @@
 import itertools
 from collections import Counter
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; evaluate() covers everything without it
+    np = None
+
+from . import cards as cards_mod
+from . import timing
+
 RANKS = "23456789TJQKA"
 RANK_VALUE = {rank: idx + 2 for idx, rank in enumerate(RANKS)}
 
+# Packed scores: category in the high bits, up to five 4-bit rank values below.
+# Packing a (rank, detail) tuple this way preserves its ordering, so ints compare
+# exactly like the tuples returned by score_five().
+SCORE_SHIFT = 20
+NO_HAND = -1
+
 
 def card_value(card):
+    if isinstance(card, int):
+        return (card >> 2) + 2
     return RANK_VALUE[card[0]]
 
 
+def card_suit(card):
+    return card & 3 if isinstance(card, int) else card[1]
+
+
 def straight_high(values):
     uniq = sorted(set(values), reverse=True)
     if 14 in uniq:
@@ -22,7 +42,7 @@ def straight_high(values):
 
 def score_five(cards):
     values = sorted([card_value(card) for card in cards], reverse=True)
-    suits = [card[1] for card in cards]
+    suits = [card_suit(card) for card in cards]
     counts = Counter(values)
     ordered = sorted(counts.items(), key=lambda x: (-x[1], -x[0]))
 
@@ -64,16 +84,182 @@ def score_five(cards):
     return (0, values)
 
 
+def pack_score(score):
+    """Pack a (rank, detail) tuple into a single comparable int."""
+    rank, detail = score
+    packed = rank
+    for idx in range(5):
+        packed = (packed << 4) | (detail[idx] if idx < len(detail) else 0)
+    return packed
+
+
+def score_category(score):
+    """Hand category (0 high card .. 8 straight flush) of a packed int or (rank, detail) tuple."""
+    if isinstance(score, (tuple, list)):
+        return score[0] if score else NO_HAND
+    if score is None:
+        return NO_HAND
+    return score >> SCORE_SHIFT
+
+
+# Lookup tables, built once on first use (see _build_tables).
+_CARD_KEY = [5 ** (card >> 2) for card in range(52)]  # base-5 rank-multiset hash
+_CARD_BIT = [1 << (card >> 2) for card in range(52)]  # rank bit within its suit
+_STRAIGHT_TOP = []  # 13-bit rank mask -> straight high value (0 if none)
+_FLUSH = []  # 13-bit suited rank mask -> packed score (0 if fewer than 5 cards)
+_NONFLUSH = {}  # rank-multiset key -> packed score ignoring suits
+_BATCH_TABLES = {}  # numpy copies of the above for evaluate_batch()
+
+
+def _straight_top(mask):
+    for top in range(12, 3, -1):
+        window = 0b11111 << (top - 4)
+        if mask & window == window:
+            return top + 2
+    wheel = (1 << 12) | 0b1111  # A-2-3-4-5
+    if mask & wheel == wheel:
+        return 5
+    return 0
+
+
+def _rank_only_score(counts):
+    present = [idx + 2 for idx in range(12, -1, -1) if counts[idx]]
+    quads = [idx + 2 for idx in range(12, -1, -1) if counts[idx] == 4]
+    trips = [idx + 2 for idx in range(12, -1, -1) if counts[idx] == 3]
+    pairs = [idx + 2 for idx in range(12, -1, -1) if counts[idx] == 2]
+    mask = sum(1 << idx for idx in range(13) if counts[idx])
+    straight_top = _STRAIGHT_TOP[mask]
+
+    if quads:
+        quad = quads[0]
+        return (7, [quad, max(v for v in present if v != quad)])
+    if trips and (len(trips) > 1 or pairs):
+        return (6, [trips[0], max(trips[1:] + pairs)])
+    if straight_top:
+        return (4, [straight_top])
+    if trips:
+        return (3, [trips[0]] + [v for v in present if v != trips[0]][:2])
+    if len(pairs) >= 2:
+        high_pair, low_pair = pairs[0], pairs[1]
+        return (2, [high_pair, low_pair, max(v for v in present if v not in (high_pair, low_pair))])
+    if pairs:
+        return (1, [pairs[0]] + [v for v in present if v != pairs[0]][:3])
+    return (0, present[:5])
+
+
+def _fill_nonflush(counts, rank_idx, remaining, key):
+    if rank_idx < 0:
+        return
+    for count in range(min(4, remaining) + 1):
+        counts[rank_idx] = count
+        sub_key = key + count * 5**rank_idx
+        left = remaining - count
+        if count and left <= 2:  # 5-7 cards placed; lower ranks are all zero
+            _NONFLUSH[sub_key] = pack_score(_rank_only_score(counts))
+        if left:
+            _fill_nonflush(counts, rank_idx - 1, left, sub_key)
+    counts[rank_idx] = 0
+
+
+def _build_tables():
+    straight = [_straight_top(mask) for mask in range(1 << 13)]
+    flush = [0] * (1 << 13)
+    for mask in range(1 << 13):
+        if mask.bit_count() < 5:
+            continue
+        if straight[mask]:
+            flush[mask] = pack_score((8, [straight[mask]]))
+        else:
+            values = [idx + 2 for idx in range(12, -1, -1) if mask >> idx & 1]
+            flush[mask] = pack_score((5, values[:5]))
+    _STRAIGHT_TOP[:] = straight
+    _fill_nonflush([0] * 13, 12, 7, 0)
+    # Publish the flush table last; it doubles as the "tables ready" flag.
+    _FLUSH[:] = flush
+
+
+def evaluate(card_ints):
+    """
+    Table-driven best-hand rank for 5-7 integer-encoded cards.
+    Returns a packed int (see pack_score), or NO_HAND for fewer than 5 cards.
+    """
+    if not _FLUSH:
+        _build_tables()
+    if len(card_ints) < 5:
+        return NO_HAND
+    if len(card_ints) > 7:
+        return max(evaluate(combo) for combo in itertools.combinations(card_ints, 7))
+
+    key = 0
+    suit_masks = [0, 0, 0, 0]
+    for card in card_ints:
+        key += _CARD_KEY[card]
+        suit_masks[card & 3] |= _CARD_BIT[card]
+    # With at most 7 cards a flush rules out full house and quads, so it is the answer.
+    for mask in suit_masks:
+        flush = _FLUSH[mask]
+        if flush:
+            return flush
+    return _NONFLUSH[key]
+
+
+def evaluate_parts(key, suit_masks, count):
+    """
+    evaluate() from already-accumulated parts: the rank-multiset key (sum of 5**rank)
+    and the four per-suit rank masks of `count` cards. Lets callers that add cards one
+    at a time (see hand_state.HandState) read the rank without rescanning.
+    """
+    if not _FLUSH:
+        _build_tables()
+    if count < 5:
+        return NO_HAND
+    for mask in suit_masks:
+        flush = _FLUSH[mask]
+        if flush:
+            return flush
+    return _NONFLUSH[key]
+
+
+def _batch_tables():
+    if not _BATCH_TABLES:
+        if not _FLUSH:
+            _build_tables()
+        keys = sorted(_NONFLUSH)
+        _BATCH_TABLES.update(
+            card_key=np.array(_CARD_KEY, dtype=np.int64),
+            card_bit=np.array(_CARD_BIT, dtype=np.int32),
+            nonflush_keys=np.array(keys, dtype=np.int64),
+            nonflush_values=np.array([_NONFLUSH[key] for key in keys], dtype=np.int32),
+            flush=np.array(_FLUSH, dtype=np.int32),
+        )
+    return _BATCH_TABLES
+
+
+def evaluate_batch(card_matrix):
+    """
+    Vectorized evaluate(): one packed score per row of an (n, 5-7) int card array.
+    Requires numpy.
+    """
+    tables = _batch_tables()
+    card_matrix = np.asarray(card_matrix)
+    keys = tables["card_key"][card_matrix].sum(axis=1)
+    scores = tables["nonflush_values"][np.searchsorted(tables["nonflush_keys"], keys)]
+    bits = tables["card_bit"][card_matrix]
+    suits = card_matrix & 3
+    for suit in range(4):
+        # Rank bits are unique within a suit, so the sum is the suit's rank mask.
+        suit_mask = np.where(suits == suit, bits, 0).sum(axis=1)
+        flush = tables["flush"][suit_mask]
+        scores = np.where(flush > 0, flush, scores)
+    return scores
+
+
+@timing.timed("hand_eval.evaluate_best")
 def evaluate_best(cards):
-    """Return best 5-card score for up to 7 cards."""
-    best = (-1, [])
-    for combo in itertools.combinations(cards, 5):
-        score = score_five(combo)
-        if score > best:
-            best = score
-    return best
+    """Return best 5-card score for up to 7 cards as a packed, comparable int."""
+    return evaluate(cards_mod.encode(cards))
 
 
 def compare(hand_a, hand_b):
-    """Compare two (rank, detail) tuples."""
+    """Compare two scores (packed ints or (rank, detail) tuples)."""
     return (hand_a > hand_b) - (hand_a < hand_b)
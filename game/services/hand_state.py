@@ -0,0 +1,105 @@
+from . import cards, hand_eval, timing
+
+_STRAIGHT_DRAW = []  # 13-bit rank mask -> True if four ranks fit in a five-rank window
+
+
+def _straight_draw(mask):
+    # Four distinct ranks inside a five-rank span; the ace also counts low.
+    uniq = [idx + 2 for idx in range(13) if mask >> idx & 1]
+    if 14 in uniq:
+        uniq.append(1)
+    uniq.sort()
+    for i in range(len(uniq) - 3):
+        window = uniq[i : i + 4]
+        if window[-1] - window[0] <= 4 and len(window) == 4:
+            return True
+    return False
+
+
+class HandState:
+    """
+    Running evaluation of one seat's cards (hole + board). Built at the deal and
+    extended card by card on flop, turn and river; rank counts, suit counts and the
+    straight mask stay current, so best and the draw flags are O(1) reads.
+    """
+
+    __slots__ = ("best", "count", "key", "rank_counts", "rank_mask", "suit_counts", "suit_masks")
+
+    def __init__(self, hand_cards=()):
+        self.count = 0
+        self.key = 0  # rank-multiset key, as in hand_eval
+        self.suit_masks = [0, 0, 0, 0]
+        self.rank_counts = [0] * 13
+        self.suit_counts = [0, 0, 0, 0]
+        self.rank_mask = 0
+        self.best = hand_eval.NO_HAND
+        self.extend(hand_cards)
+
+    def add(self, card):
+        card = cards.to_int(card)
+        rank, suit = card >> 2, card & 3
+        self.count += 1
+        self.key += 5**rank
+        self.suit_masks[suit] |= 1 << rank
+        self.rank_counts[rank] += 1
+        self.suit_counts[suit] += 1
+        self.rank_mask |= 1 << rank
+        self.best = hand_eval.evaluate_parts(self.key, self.suit_masks, self.count)
+
+    def extend(self, new_cards):
+        for card in new_cards:
+            self.add(card)
+
+    @property
+    def category(self):
+        return hand_eval.score_category(self.best)
+
+    @property
+    def flush_draw(self):
+        return max(self.suit_counts) >= 4
+
+    @property
+    def straight_draw(self):
+        if not _STRAIGHT_DRAW:
+            _STRAIGHT_DRAW[:] = [_straight_draw(mask) for mask in range(1 << 13)]
+        return _STRAIGHT_DRAW[self.rank_mask]
+
+    def to_list(self):
+        """Compact JSON-friendly form for the session: [count, key, four suit masks]."""
+        return [self.count, self.key] + self.suit_masks
+
+    @classmethod
+    def from_list(cls, packed):
+        hs = cls()
+        hs.count, hs.key = packed[0], packed[1]
+        hs.suit_masks = list(packed[2:6])
+        hs.suit_counts = [mask.bit_count() for mask in hs.suit_masks]
+        hs.rank_mask = hs.suit_masks[0] | hs.suit_masks[1] | hs.suit_masks[2] | hs.suit_masks[3]
+        key = hs.key
+        for rank in range(13):
+            key, hs.rank_counts[rank] = divmod(key, 5)
+        hs.best = hand_eval.evaluate_parts(hs.key, hs.suit_masks, hs.count)
+        return hs
+
+
+def for_seat(seat, community):
+    """
+    HandState for a seat dict ("hand" plus the shared board), read from seat["hs"].
+    seat["hs"] is a per-request memo: state_codec does not store it, so it is
+    rebuilt from the cards on the first use after a load, or when out of step.
+    """
+    packed = seat.get("hs")
+    if packed and packed[0] == len(seat.get("hand") or []) + len(community):
+        return HandState.from_list(packed)
+    hs = HandState(list(seat.get("hand") or []) + list(community))
+    seat["hs"] = hs.to_list()
+    return hs
+
+
+@timing.timed("hand_state.extend_seats")
+def extend_seats(seats, community, new_cards):
+    """Add freshly dealt board cards to every seat's stored hand state."""
+    for seat in seats:
+        hs = for_seat(seat, community)
+        hs.extend(new_cards)
+        seat["hs"] = hs.to_list()
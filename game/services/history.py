@@ -0,0 +1,87 @@
+from ..models import HandEvent
+from .state import LOG_RING
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Unsaved lines that force a flush mid-hand. A move adds only a few lines, so the
+# session ring (which keeps unsaved lines) stays within one move of LOG_RING.
+FLUSH_AT = LOG_RING
+
+
+def _pending(state):
+    """(seq of the first unsaved line, unsaved lines) of the session log."""
+    log = state.get("log") or []
+    offset = state.get("log_offset", 0)
+    pending = log[max(state.get("log_saved", 0) - offset, 0) :]
+    return offset + len(log) - len(pending), pending
+
+
+def flush(user, state, force=False):
+    """
+    Append the log lines added since the last flush to the history store in one
+    batch and mark them saved, so state.trim_log may drop them from the session.
+    Lines are buffered in the session until the hand ends, FLUSH_AT of them are
+    waiting, or force is set, so a hand costs one or two INSERTs, not one per move.
+    """
+    start, pending = _pending(state)
+    if not pending or user is None or not user.is_authenticated:
+        return 0
+    hand_over = state.get("street") == "hand_over" or state.get("player", {}).get("folded")
+    if not (force or hand_over or len(pending) >= FLUSH_AT):
+        return 0
+    hand_id = state["hand_id"]
+    HandEvent.objects.bulk_create(
+        [
+            HandEvent(user=user, hand_id=hand_id, seq=seq, text=str(text)[:255])
+            for seq, text in enumerate(pending, start=start)
+        ],
+        ignore_conflicts=True,  # a retried request may flush the same lines twice
+    )
+    state["log_saved"] = start + len(pending)
+    return len(pending)
+
+
+def events(user, hand_id, after=-1, limit=PAGE_SIZE, state=None):
+    """
+    One page of a hand's events with seq > after, oldest first. Pass the session
+    state to include its not yet flushed lines when hand_id is the current hand.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = list(
+        HandEvent.objects.filter(user=user, hand_id=hand_id, seq__gt=after)
+        .order_by("seq")
+        .values_list("seq", "text")[: limit + 1]
+    )
+    if state is not None and state.get("hand_id") == hand_id and len(rows) <= limit:
+        start, pending = _pending(state)
+        stored = {seq for seq, _text in rows}
+        rows += [
+            (seq, str(text)[:255])
+            for seq, text in enumerate(pending, start=start)
+            if seq > after and seq not in stored
+        ][: limit + 1 - len(rows)]
+    page = [{"seq": seq, "text": text} for seq, text in rows[:limit]]
+    return {
+        "hand_id": str(hand_id),
+        "events": page,
+        "next_after": page[-1]["seq"] if page else after,
+        "has_more": len(rows) > limit,
+    }
+
+
+def log_since(user, state, since):
+    """
+    Log lines with seq >= since for the current hand: from the session ring when it
+    still holds them, otherwise from the store. Returns {"offset", "lines"}.
+    """
+    log = state.get("log") or []
+    offset = state.get("log_offset", 0)
+    total = offset + len(log)
+    since = max(0, min(since, total))
+    if since >= offset:
+        return {"offset": since, "lines": log[since - offset :]}
+    older = HandEvent.objects.filter(user=user, hand_id=state.get("hand_id"), seq__gte=since, seq__lt=offset)
+    lines = list(older.order_by("seq").values_list("text", flat=True))
+    if len(lines) != offset - since:  # not in the store either; send what the ring has
+        return {"offset": offset, "lines": log}
+    return {"offset": since, "lines": lines + log}
@@ -1,70 +1,293 @@
+import asyncio
 import json
 import os
-import urllib.error
-import urllib.request
-
-
-def summarize_state(state, win_prob, policy_hint):
-    player = state.get("player", {})
-    bots = state.get("bots", [])
-    board = " ".join(state.get("community") or []) or "none"
-    hero = " ".join(player.get("hand") or []) or "unknown"
-    pending = state.get("pending_call", 0)
-    bot_bits = []
-    for bot in bots:
-        status = "folded" if bot.get("folded") else "in"
-        bot_bits.append(f"{bot.get('name')} ({status}, stack {bot.get('stack')})")
-    opponents = "; ".join(bot_bits) or "none"
-    policy_text = f"{policy_hint['action']} - {policy_hint['reason']}" if policy_hint else "none"
-    pct = int(win_prob * 100)
+import threading
+import urllib.parse
+
+from . import llm_router, policy, timing, tip_cache
+
+DEFAULT_ENDPOINT = "http://127.0.0.1:11434/api/generate"
+DEFAULT_MODEL = "gemma3:4b"
+_DRAW_NAMES = {"fd": "a flush draw", "sd": "a straight draw"}
+_TEMPLATE_ENDINGS = {
+    "raise": "you are ahead often enough to build the pot.",
+    "call": "the price is good enough to continue.",
+    "check": "take the free card.",
+    "fold": "not enough equity to pay to continue.",
+}
+
+
+def summarize_spot(spot):
+    """
+    Prompt for a tip_cache.canonical_spot. Only bucketed facts go in, so the tip
+    holds for every decision that shares the cache key.
+    """
+    hand = spot["hand"]
+    if spot["draws"]:
+        hand += " with " + " and ".join(_DRAW_NAMES[draw] for draw in spot["draws"].split("+"))
+    facing = "nothing to call"
+    if spot["pot_odds"]:
+        facing = f"pot odds about {spot['pot_odds']}-{spot['pot_odds'] + tip_cache.POT_ODDS_BUCKET}%"
     return (
         "One-sentence poker tip, no emojis. "
-        f"Hero: {hero}. Board: {board}. Street: {state.get('street')}. "
-        f"Pot: {state.get('pot')}, to call: {pending}. Opponents: {opponents}. "
-        f"Equity: {pct}%. Policy: {policy_text}. "
+        f"Street: {spot['street']}. Hero has {hand}. "
+        f"Equity: {spot['equity']}-{spot['equity'] + tip_cache.EQUITY_BUCKET}%. Facing: {facing}. "
+        f"Policy: {spot['action']}. "
         "Give the best next action and why in one short sentence."
     )
 
 
-def query_ollama(prompt, *, timeout=30):
+def template_tip(state, win_prob, policy_hint=None):
+    """Deterministic tip from policy.recommend, used when no model answers in time."""
+    hint = policy_hint or policy.recommend(state, win_prob)
+    reason = hint["reason"].replace(" / ", ", ")
+    return f"{hint['action'].capitalize()}: {reason}; {_TEMPLATE_ENDINGS.get(hint['action'], '')}".strip()
+
+
+# Model I/O runs on one long-lived event loop in a daemon thread. Request loops (an
+# async view under WSGI gets a new one per request) and prefetch threads hand their
+# work to it, so its keep-alive connections are the only ones pooled and outlive
+# every request.
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def background_loop():
+    """The process's model I/O event loop, started on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-loop", daemon=True).start()
+    return _loop
+
+
+def run(coro):
+    """Run coro on background_loop() and block this (non-loop) thread for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, background_loop()).result()
+
+
+async def relay(make_stream):
+    """
+    Iterate the async generator make_stream() on background_loop() and yield its
+    items in the calling loop. Closing this generator cancels the remote one.
+    """
+    loop = asyncio.get_running_loop()
+    if loop is background_loop():
+        async for item in make_stream():
+            yield item
+        return
+    queue = asyncio.Queue()
+    done = object()
+
+    def put(item):
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    async def pump():
+        try:
+            async for item in make_stream():
+                put(item)
+        finally:
+            put(done)
+
+    remote = asyncio.run_coroutine_threadsafe(pump(), background_loop())
+    try:
+        while (item := await queue.get()) is not done:
+            yield item
+    finally:
+        remote.cancel()
+
+
+def query_ollama(prompt, *, deadline=None):
     """
-    Hit a local Ollama server if available.
-    Returns text or None if unavailable.
+    Blocking llm_router.generate() for threads (tip prefetch). Returns text, or None
+    if no healthy backend starts answering within the deadline.
     """
-    endpoint = os.getenv("OLLAMA_ENDPOINT", "http://127.0.0.1:11434/api/generate")
-    # Default to the lighter gemma3:4b model for lower latency; env var can override.
-    model = os.getenv("OLLAMA_MODEL", "gemma3:4b")
-    payload = {
+    return run(llm_router.generate(prompt, deadline))
+
+
+def default_endpoint():
+    return os.getenv("OLLAMA_ENDPOINT", DEFAULT_ENDPOINT)
+
+
+def _payload(prompt, model, stream):
+    return {
         "model": model,
         "prompt": prompt,
-        "stream": False,
+        "stream": stream,
         "temperature": 0.2,
         "top_p": 0.9,
         "max_tokens": 60,  # keep replies snappy
     }
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(endpoint, data=data, headers={"Content-Type": "application/json"})
-    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))  # ignore env proxies
-    try:
-        with opener.open(req, timeout=timeout) as resp:
-            body = resp.read()
-    except (urllib.error.URLError, TimeoutError, ConnectionError):
-        return None
 
-    try:
-        parsed = json.loads(body.decode("utf-8"))
-    except json.JSONDecodeError:
-        return None
-    resp = parsed.get("response")
-    if isinstance(resp, str):
-        resp = resp.strip()
-    return resp or None
+
+class AsyncOllamaClient:
+    """
+    Minimal asyncio HTTP/1.1 client for the Ollama generate API that yields streamed
+    tokens as they arrive. Keeps up to max_idle keep-alive connections, but only for
+    background_loop(): a connection is bound to the loop that opened it, and other
+    loops may close right after the request (their sockets are closed instead).
+    """
+
+    def __init__(self, endpoint, timeout=30, max_idle=4):
+        parts = urllib.parse.urlsplit(endpoint)
+        self.endpoint = endpoint
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = parts.scheme == "https"
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = []  # (reader, writer) on background_loop()
+
+    def _pool(self):
+        return self._idle if asyncio.get_running_loop() is _loop else []
+
+    async def _connect(self):
+        pool = self._pool()
+        while pool:
+            reader, writer = pool.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl or None), self.timeout
+        )
+        return reader, writer, False
+
+    def _release(self, reader, writer):
+        pool = self._pool()
+        if pool is self._idle and len(pool) < self.max_idle and not writer.is_closing():
+            pool.append((reader, writer))
+        else:
+            writer.close()
+
+    async def _send(self, body):
+        """Send the request; retries once on a fresh socket if a pooled one went stale."""
+        request = (
+            f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("ascii") + body
+        for _ in range(2):
+            reader, writer, reused = await self._connect()
+            try:
+                writer.write(request)
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+            except (ConnectionError, OSError):
+                status_line = b""
+            if status_line or not reused:
+                return reader, writer, status_line
+            writer.close()
+        return reader, writer, status_line
+
+    async def _read_headers(self, reader):
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+    async def _body_chunks(self, reader, headers):
+        if headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await asyncio.wait_for(reader.readline(), self.timeout)).split(b";")[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass  # trailers
+                    return
+                chunk = await asyncio.wait_for(reader.readexactly(size + 2), self.timeout)
+                yield chunk[:-2]
+        elif "content-length" in headers:
+            yield await asyncio.wait_for(reader.readexactly(int(headers["content-length"])), self.timeout)
+        else:
+            while chunk := await asyncio.wait_for(reader.read(65536), self.timeout):
+                yield chunk
+
+    async def stream(self, prompt, model):
+        """Yield response text fragments as Ollama streams them (NDJSON lines)."""
+        body = json.dumps(_payload(prompt, model, True)).encode("utf-8")
+        reader, writer, status_line = await self._send(body)
+        reusable = False
+        try:
+            if not status_line.startswith(b"HTTP/1.1 200"):
+                return
+            headers = await self._read_headers(reader)
+            buffer = b""
+            async for chunk in self._body_chunks(reader, headers):
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        fragment = json.loads(line).get("response")
+                    except json.JSONDecodeError:
+                        continue
+                    if fragment:
+                        yield fragment
+            reusable = headers.get("connection") != "close"
+        finally:
+            if reusable:
+                self._release(reader, writer)
+            else:
+                writer.close()
+
+    async def generate(self, prompt, model):
+        """Full response text, or None if the server is unavailable."""
+        try:
+            parts = [fragment async for fragment in self.stream(prompt, model)]
+        except (OSError, EOFError, TimeoutError, ValueError):
+            return None  # EOFError: asyncio.IncompleteReadError, the reply was cut off
+        return "".join(parts).strip() or None
+
+
+_async_clients = {}
+
+
+def async_client(endpoint=None):
+    """Shared AsyncOllamaClient for an endpoint (default: OLLAMA_ENDPOINT)."""
+    endpoint = endpoint or default_endpoint()
+    client = _async_clients.get(endpoint)
+    if client is None:
+        client = _async_clients[endpoint] = AsyncOllamaClient(endpoint)
+    return client
+
+
+async def stream_guidance(state, win_prob, policy_hint):
+    """
+    Async, streamed ai_guidance(): yields tip fragments; nothing if no server answers.
+    Goes through tip_cache, so repeated and concurrent requests for the same spot
+    share one model call, which runs on background_loop().
+    """
+    spot = tip_cache.canonical_spot(state, win_prob, policy_hint)
+    prompt = summarize_spot(spot)
+    async for fragment in tip_cache.stream(spot, lambda: relay(lambda: llm_router.stream(prompt))):
+        yield fragment
+
+
+async def ai_guidance_async(state, win_prob, policy_hint):
+    with timing.span("llm.ai_guidance_async"):
+        parts = [fragment async for fragment in stream_guidance(state, win_prob, policy_hint)]
+    return "".join(parts).strip() or None
 
 
+@timing.timed("llm.ai_guidance")
 def ai_guidance(state, win_prob, policy_hint):
     """
     Optional LLM-based guidance layered on top of Monte Carlo + heuristics.
     Safe to fail silently if no model/server is running.
     """
-    prompt = summarize_state(state, win_prob, policy_hint)
-    return query_ollama(prompt)
+    spot = tip_cache.canonical_spot(state, win_prob, policy_hint)
+    key = tip_cache.spot_key(spot)
+    cache = tip_cache.get_cache()
+    note = cache.get(key)
+    if note is None:
+        note = query_ollama(summarize_spot(spot))
+        if note:
+            cache.set(key, note)
+    return note
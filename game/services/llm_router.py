@@ -0,0 +1,211 @@
+import asyncio
+import os
+import statistics
+import threading
+from collections import Counter, deque
+
+from asgiref.sync import sync_to_async
+
+from . import breaker, llm
+
+LATENCY_WINDOW = 50  # recent time-to-first-token samples kept per backend
+HEDGE_MIN_SAMPLES = 5  # p95 needs some history before it can time a hedge
+DEFAULT_DEADLINE = 10.0  # seconds for some backend to start answering
+
+
+class Backend:
+    """One endpoint + model, with this process's rolling time-to-first-token."""
+
+    def __init__(self, endpoint, model):
+        self.endpoint = endpoint
+        self.model = model
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+
+    @property
+    def name(self):
+        return f"{self.model}@{self.endpoint}"
+
+    def percentile(self, pct):
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else None
+
+    def expected(self):
+        """
+        Median first-token latency; 0 until measured, so new backends get tried. A
+        failure or deadline miss counts as a sample of the full deadline, so a backend
+        that fails fast is not ranked first.
+        """
+        return statistics.median(self.latencies) if self.latencies else 0.0
+
+    def penalize(self, deadline):
+        self.latencies.append(deadline)
+
+
+_backends = None
+_backends_lock = threading.Lock()
+_counts = Counter()  # hedges / deadline_misses / failovers
+
+
+def backends():
+    """Configured backends (settings.LLM_BACKENDS, else OLLAMA_ENDPOINT + OLLAMA_MODEL)."""
+    global _backends
+    if _backends is None:
+        from django.conf import settings
+
+        configured = getattr(settings, "LLM_BACKENDS", None) if settings.configured else None
+        if not configured:
+            configured = [(llm.default_endpoint(), os.getenv("OLLAMA_MODEL", llm.DEFAULT_MODEL))]
+        with _backends_lock:
+            if _backends is None:
+                _backends = [Backend(endpoint, model) for endpoint, model in configured]
+    return _backends
+
+
+def reset():
+    """Forget backends and their latencies (settings are re-read on next use)."""
+    global _backends
+    _backends = None
+    _counts.clear()
+
+
+def _settings():
+    from django.conf import settings
+
+    if not settings.configured:
+        return DEFAULT_DEADLINE, False
+    return getattr(settings, "LLM_DEADLINE", DEFAULT_DEADLINE), getattr(settings, "LLM_HEDGE", False)
+
+
+def ranked():
+    """Backends fastest first by median first-token latency."""
+    return sorted(backends(), key=Backend.expected)
+
+
+async def _pump(idx, backend, prompt, queue, deadline):
+    """Stream backend's reply into queue as (idx, fragment), then (idx, None)."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    backend.requests += 1
+    answered = failed = False
+    try:
+        try:
+            async for fragment in llm.async_client(backend.endpoint).stream(prompt, backend.model):
+                if not answered:
+                    answered = True
+                    backend.latencies.append(loop.time() - started)
+                queue.put_nowait((idx, fragment))
+        except (OSError, EOFError, TimeoutError, ValueError):
+            failed = True  # EOFError: asyncio.IncompleteReadError, the reply was cut off
+        if failed or not answered:
+            backend.failures += 1
+        if not answered:
+            backend.penalize(deadline)
+        # An error response, a dropped connection or a truncated reply counts as a failure.
+        await sync_to_async(breaker.record_failure if failed or not answered else breaker.record_success)(
+            backend.endpoint
+        )
+    finally:
+        queue.put_nowait((idx, None))
+
+
+async def stream(prompt, deadline=None, hedge=None):
+    """
+    Yield the reply from the fastest healthy backend. If it has not started answering
+    by its p95 first-token latency and hedging is on, the next backend is asked too and
+    the first to answer wins (the other request is cancelled). A backend that fails is
+    replaced by the next healthy one. Yields nothing if no backend starts answering
+    within the deadline.
+    """
+    default_deadline, default_hedge = _settings()
+    deadline = default_deadline if deadline is None else deadline
+    hedge = default_hedge if hedge is None else hedge
+    loop = asyncio.get_running_loop()
+    give_up = loop.time() + deadline
+    candidates = iter(ranked())
+    queue = asyncio.Queue()
+    attempts = []  # (backend, task)
+
+    async def start_next():
+        for backend in candidates:
+            if await sync_to_async(breaker.allow)(backend.endpoint):
+                task = asyncio.ensure_future(_pump(len(attempts), backend, prompt, queue, deadline))
+                attempts.append((backend, task))
+                return True
+        return False
+
+    try:
+        if not await start_next():
+            return
+        live = 1
+        primary = attempts[0][0]
+        hedge_delay = primary.percentile(95) if hedge and len(primary.latencies) >= HEDGE_MIN_SAMPLES else None
+        hedge_at = loop.time() + hedge_delay if hedge_delay is not None else None
+
+        winner = first = None
+        while winner is None:
+            wake = give_up if hedge_at is None else min(give_up, hedge_at)
+            try:
+                idx, fragment = await asyncio.wait_for(queue.get(), max(0.0, wake - loop.time()))
+            except TimeoutError:
+                if hedge_at is None or loop.time() >= give_up:
+                    _counts["deadline_misses"] += 1
+                    for backend, task in attempts:
+                        if not task.done():
+                            backend.penalize(deadline)  # still silent at the deadline
+                    return
+                hedge_at = None
+                if await start_next():
+                    _counts["hedges"] += 1
+                    live += 1
+                continue
+            if fragment is not None:
+                winner, first = idx, fragment
+            else:
+                live -= 1
+                if live == 0:
+                    if not await start_next():
+                        return
+                    _counts["failovers"] += 1
+                    live = 1
+
+        for idx, (_backend, task) in enumerate(attempts):
+            if idx != winner:
+                task.cancel()
+        attempts[winner][0].wins += 1
+        yield first
+        while True:
+            idx, fragment = await queue.get()
+            if idx != winner:
+                continue
+            if fragment is None:
+                return
+            yield fragment
+    finally:
+        for _backend, task in attempts:
+            if not task.done():
+                task.cancel()
+
+
+async def generate(prompt, deadline=None, hedge=None):
+    """Full reply text from stream(), or None."""
+    parts = [fragment async for fragment in stream(prompt, deadline, hedge)]
+    return "".join(parts).strip() or None
+
+
+def stats():
+    deadline, hedge = _settings()
+    rows = {}
+    for backend in backends():
+        p50, p95 = backend.percentile(50), backend.percentile(95)
+        rows[backend.name] = {
+            "requests": backend.requests,
+            "wins": backend.wins,
+            "failures": backend.failures,
+            "samples": len(backend.latencies),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+    return {"deadline": deadline, "hedge": hedge, "backends": rows, **_counts}
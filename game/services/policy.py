@@ -1,24 +1,9 @@
-from . import hand_eval
+from . import hand_eval, hand_state
 
 
 def evaluate_draws(cards):
-    suits = {}
-    ranks = []
-    for c in cards:
-        suits[c[1]] = suits.get(c[1], 0) + 1
-        ranks.append(hand_eval.card_value(c))
-    flush_draw = any(count >= 4 for count in suits.values())
-
-    uniq = sorted(set(ranks))
-    if 14 in uniq:
-        uniq.append(1)
-    straight_draw = False
-    for i in range(len(uniq) - 3):
-        window = uniq[i : i + 4]
-        if window[-1] - window[0] <= 4 and len(window) == 4:
-            straight_draw = True
-            break
-    return flush_draw, straight_draw
+    hs = hand_state.HandState(cards)
+    return hs.flush_draw, hs.straight_draw
 
 
 def recommend(state, win_prob):
@@ -30,10 +15,9 @@ def recommend(state, win_prob):
     pending = state.get("pending_call", 0)
     pot = state.get("pot", 0)
     player = state.get("player", {})
-    hero_cards = (player.get("hand") or []) + (state.get("community") or [])
-    best_score = hand_eval.evaluate_best(hero_cards)
-    rank_label = hand_eval_rank_label(best_score[0])
-    flush_draw, straight_draw = evaluate_draws(hero_cards)
+    hs = hand_state.for_seat(player, state.get("community") or [])
+    rank_label = hand_eval_rank_label(hand_eval.score_category(hs.best))
+    flush_draw, straight_draw = hs.flush_draw, hs.straight_draw
 
     reason_bits = []
     if flush_draw:
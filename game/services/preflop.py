@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+from . import cards
+
+TABLE_PATH = Path(__file__).resolve().parent / "data" / "preflop_equity.json"
+
+_TABLE = {}
+
+
+def canonical_hand(hole):
+    """Suit-isomorphic starting hand class, e.g. "AA", "AKs", "T9o"."""
+    first, second = sorted(cards.encode(hole), reverse=True)
+    high, low = cards.RANKS[first >> 2], cards.RANKS[second >> 2]
+    if high == low:
+        return high + low
+    return high + low + ("s" if first & 3 == second & 3 else "o")
+
+
+def starting_hands():
+    """All 169 classes with a representative hole for each."""
+    hands = []
+    for hi in range(12, -1, -1):
+        for lo in range(hi, -1, -1):
+            if hi == lo:
+                hands.append((cards.RANKS[hi] * 2, [hi * 4, lo * 4 + 1]))
+            else:
+                hands.append((cards.RANKS[hi] + cards.RANKS[lo] + "s", [hi * 4, lo * 4]))
+                hands.append((cards.RANKS[hi] + cards.RANKS[lo] + "o", [hi * 4, lo * 4 + 1]))
+    return hands
+
+
+def load_table(path=TABLE_PATH):
+    if not _TABLE:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                _TABLE.update(json.load(fh))
+        except FileNotFoundError:
+            _TABLE["equity"] = {}
+    return _TABLE
+
+
+def write_table(equity, iterations, path=TABLE_PATH):
+    # One starting hand per line keeps regenerated tables diff-friendly.
+    rows = ",\n".join(f"    {json.dumps(name)}: {json.dumps(row)}" for name, row in equity.items())
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(f'{{\n  "iterations": {iterations},\n  "equity": {{\n{rows}\n  }}\n}}\n')
+    _TABLE.clear()
+
+
+def lookup(hole, num_opponents):
+    """Precomputed equity vs num_opponents random hands, or None if not tabulated."""
+    row = load_table().get("equity", {}).get(canonical_hand(hole))
+    if not row or not 1 <= num_opponents <= len(row):
+        return None
+    return row[num_opponents - 1]
@@ -0,0 +1,158 @@
+import multiprocessing
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from . import engine, equity_cache, simulation
+from . import state as state_svc
+
+# Safety cap on hero decisions per hand; a normal hand needs well under ten.
+MAX_MOVES = 40
+
+# Bot event suffixes (see engine.bots_act) -> action bucket, most specific first.
+BOT_ACTIONS = (
+    ("goes all-in", "shove"),
+    ("calls all-in", "call"),
+    ("raises", "raise"),
+    ("checks", "check"),
+    ("calls", "call"),
+    ("folds", "fold"),
+)
+
+
+def _advice_move(state):
+    hint = state.get("last_policy") or {}
+    return hint.get("action", "check")
+
+
+HERO_POLICIES = {
+    "advice": _advice_move,  # follow policy.recommend, as a player taking every hint would
+    "call": lambda state: "call",
+    "fold": lambda state: "fold",
+}
+
+
+def play_hand(hero="advice"):
+    """
+    Play one hand headlessly: state.new_hand, then engine moves chosen by the scripted
+    hero policy until the hand is over (or the hero folds). Returns per-seat chip
+    deltas and the events.
+    """
+    choose = HERO_POLICIES[hero]
+    state = state_svc.new_hand()
+    seats = [state["player"]] + state["bots"]
+    start = [seat["stack"] for seat in seats]
+    events = []
+    engine.maybe_opening_bots(state)
+    engine.ensure_advice(state)
+    events.extend(state["log"])
+    for _ in range(MAX_MOVES):
+        if state["street"] == "hand_over" or state["player"].get("folded"):
+            break
+        state, move_events = engine.apply_player_move(state, choose(state))
+        events.extend(move_events)
+    if state["street"] != "hand_over" and state["player"].get("folded"):
+        # The UI ends the hand for the hero on a fold; settle the pot between the
+        # remaining bots the way award_uncontested would, so chips are conserved.
+        engine.deal_remaining_board(state, events)
+        engine.showdown(state, events)
+    deltas = {seat["name"]: seat["stack"] - before for seat, before in zip(seats, start)}
+    return {"deltas": deltas, "events": events, "finished": state["street"] == "hand_over"}
+
+
+def bot_actions(events, bot_names):
+    """Count bot decisions by bucket from engine event strings."""
+    counts = {name: Counter() for name in bot_names}
+    for event in events:
+        for name in bot_names:
+            if event.startswith(name + " "):
+                text = event[len(name) + 1 :]
+                for suffix, action in BOT_ACTIONS:
+                    if text.startswith(suffix):
+                        counts[name][action] += 1
+                        break
+                break
+    return counts
+
+
+def run_batch(hands, seed=None, hero="advice"):
+    """
+    Play `hands` hands in this process and return raw totals (see merge_results).
+    A seed fixes the deals and the equity sampling (simulation.seed, which also drops
+    time budgets) and starts from an empty in-process equity cache, so a seeded run
+    does not depend on what earlier runs cached.
+    """
+    previous_cache = equity_cache.get_cache()
+    if seed is not None:
+        random.seed(seed)
+        simulation.seed(seed)
+        equity_cache.set_cache(equity_cache.LRUCache())
+    chip_totals = Counter()
+    actions = {}
+    unfinished = 0
+    started = time.perf_counter()
+    try:
+        for _ in range(hands):
+            result = play_hand(hero)
+            chip_totals.update(result["deltas"])
+            bots = [name for name in result["deltas"] if name != "You"]
+            for name, counter in bot_actions(result["events"], bots).items():
+                actions.setdefault(name, Counter()).update(counter)
+            unfinished += not result["finished"]
+    finally:
+        if seed is not None:
+            simulation.seed(None)
+            equity_cache.set_cache(previous_cache)
+    return {
+        "hands": hands,
+        "seconds": time.perf_counter() - started,
+        "chips": dict(chip_totals),
+        "actions": {name: dict(counter) for name, counter in actions.items()},
+        "unfinished": unfinished,
+    }
+
+
+def merge_results(batches, wall_seconds):
+    """Combine run_batch totals into the report: throughput, chip EV and action frequencies."""
+    hands = sum(batch["hands"] for batch in batches)
+    chips = Counter()
+    actions = {}
+    for batch in batches:
+        chips.update(batch["chips"])
+        for name, counter in batch["actions"].items():
+            actions.setdefault(name, Counter()).update(counter)
+    frequencies = {}
+    for name, counter in sorted(actions.items()):
+        decisions = sum(counter.values())
+        frequencies[name] = {
+            action: round(count / decisions, 4) for action, count in sorted(counter.items())
+        }
+        frequencies[name]["decisions"] = decisions
+    return {
+        "hands": hands,
+        "seconds": round(wall_seconds, 3),
+        "hands_per_sec": round(hands / wall_seconds, 2) if wall_seconds else 0.0,
+        "chip_ev": {name: round(total / hands, 3) for name, total in sorted(chips.items())} if hands else {},
+        "bot_actions": frequencies,
+        "unfinished": sum(batch["unfinished"] for batch in batches),
+    }
+
+
+def run(hands, workers=1, seed=None, hero="advice"):
+    """
+    Self-play `hands` hands split across `workers` processes (spawned, like the
+    simulation pool) and return the merged report.
+    """
+    workers = max(1, min(workers, hands)) if hands else 1
+    share, extra = divmod(hands, workers)
+    sizes = [share + (1 if idx < extra else 0) for idx in range(workers)]
+    seeds = [None if seed is None else seed + idx for idx in range(workers)]
+    started = time.perf_counter()
+    if workers == 1:
+        batches = [run_batch(sizes[0], seeds[0], hero)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(run_batch, size, sub_seed, hero) for size, sub_seed in zip(sizes, seeds)]
+            batches = [future.result() for future in futures]
+    return merge_results(batches, time.perf_counter() - started)
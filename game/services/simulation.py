@@ -1,37 +1,593 @@
+import atexit
+import itertools
+import math
+import multiprocessing
+import os
 import random
-from . import cards, hand_eval
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; fall back to the pure Python loop
+    np = None
 
-def estimate_win_prob(player_cards, community_cards, num_opponents=2, iterations=400, deck=None):
-    """Monte Carlo win probability vs num_opponents."""
-    used = list(player_cards) + list(community_cards)
-    base_deck = list(deck) if deck is not None else cards.remaining_deck(used)
+from . import cards, equity_cache, hand_eval, preflop, timing
 
+HAS_NUMPY = np is not None
+# Rows sampled per numpy batch; bounds the random-key matrix to a few MB.
+BATCH_SIZE = 8192
+# Enumerate exactly instead of sampling when runouts x opponent holdings stays under
+# this many hand evaluations (a turn spot vs one or two opponents is ~45k).
+EXACT_COMBO_CAP = 50000
+EXACT_MAX_OPPONENTS = 2
+# Starting guess of exact enumeration cost (microseconds per combo) by opponent count.
+# Each run refines this process's figure, so budgeted callers only enumerate when
+# the spot fits in what is left of their budget and sample otherwise.
+EXACT_US_PER_COMBO = {0: 3.0, 1: 1.0, 2: 2.2}
+_exact_us_per_combo = dict(EXACT_US_PER_COMBO)
+# Sequential sampling (adaptive_win_prob): samples per step and the Wilson z-score.
+ADAPTIVE_CHUNK = 1000 if HAS_NUMPY else 50
+MAX_DRAW_FACTOR = 4  # multi_seat_equity draws at most this many times its iterations
+# Set by seed() (selfplay --seed): one generator shared by every sampler in this
+# process, and no wall-clock budgets, since where a budget cuts sampling off (and
+# whether exact enumeration fits in it) depends on machine load.
+_seeded_rng = None
+WILSON_Z = 1.96
+
+# Persistent worker pool for estimate_win_prob(workers=N), created lazily once per
+# process (so each gunicorn worker owns its own pool after the fork).
+_pool = None
+_pool_pid = None
+_pool_workers = 0
+_pool_lock = threading.Lock()  # two threads must not each spawn (and leak) a pool
+
+
+def seed(value):
+    """Make sampling in this process reproducible from value; None restores the default."""
+    global _seeded_rng
+    if value is None:
+        _seeded_rng = None
+    else:
+        _seeded_rng = np.random.default_rng(value) if HAS_NUMPY else random.Random(value)
+
+
+def _rng():
+    if _seeded_rng is not None:
+        return _seeded_rng
+    return np.random.default_rng() if HAS_NUMPY else random
+
+
+def _deadline(budget_ms):
+    """perf_counter deadline for budget_ms, or None (no budget, or a seeded run)."""
+    return time.perf_counter() + budget_ms / 1000 if budget_ms and _seeded_rng is None else None
+
+
+@timing.timed("simulation.estimate_win_prob")
+def estimate_win_prob(
+    player_cards,
+    community_cards,
+    num_opponents=2,
+    iterations=400,
+    deck=None,
+    exact_cap=EXACT_COMBO_CAP,
+    preflop_table=True,
+    workers=None,
+    budget_ms=None,
+    with_details=False,
+):
+    """
+    Win probability vs num_opponents. Preflop spots come from the precomputed table
+    (see preflop.lookup), small turn/river spots are enumerated exactly (see
+    exact_combo_count), and everything else is Monte Carlo. Pass exact_cap=0 and
+    preflop_table=False to always sample. workers=N splits the sampling across a
+    persistent process pool for deep offline analysis.
+
+    budget_ms=N samples in chunks until the wall-clock deadline instead of a fixed
+    count (iterations then only caps the work; None means no cap). with_details=True
+    returns {"win_prob", "low", "high", "samples", "source"} so callers can see how
+    many iterations actually ran.
+    """
+    player_cards = cards.encode(player_cards)
+    community_cards = cards.encode(community_cards)
+    base_deck = cards.undealt(deck) if deck is not None else cards.remaining_deck(player_cards + community_cards)
+    deadline = _deadline(budget_ms)
+    estimate = _known_equity(
+        player_cards, community_cards, num_opponents, base_deck, exact_cap, preflop_table, deadline
+    )
+    if estimate is None and budget_ms:
+        max_iterations = iterations if iterations is not None else math.inf
+        estimate = _sample_until(player_cards, community_cards, num_opponents, base_deck, max_iterations, (), deadline)
+    elif estimate is None:
+        if workers and workers > 1:
+            counts = _simulate_parallel(player_cards, community_cards, num_opponents, iterations, base_deck, workers)
+        elif HAS_NUMPY:
+            counts = _simulate_batched(player_cards, community_cards, num_opponents, iterations, base_deck, _rng())
+        else:
+            counts = _simulate_loop(player_cards, community_cards, num_opponents, iterations, base_deck, _rng())
+        estimate = _estimate_from_counts(*counts)
+    return estimate if with_details else estimate["win_prob"]
+
+
+def _known_equity(player_cards, community_cards, num_opponents, base_deck, exact_cap, preflop_table, deadline=None):
+    """
+    Equity from the preflop table or exact enumeration, or None if the spot needs
+    sampling. With a perf_counter deadline, enumeration is skipped when its expected
+    cost (see EXACT_US_PER_COMBO) would overrun it.
+    """
+    if preflop_table and not community_cards:
+        equity = preflop.lookup(player_cards, num_opponents)
+        if equity is not None:
+            return _point_estimate(equity, preflop.load_table().get("iterations", 0), "table")
+    combos = exact_combo_count(len(community_cards), len(base_deck), num_opponents)
+    if combos is None or combos > exact_cap:
+        return None
+    started = time.perf_counter()
+    if deadline is not None and started + combos * _exact_us_per_combo[num_opponents] / 1e6 > deadline:
+        return None
+    equity = exact_win_prob(player_cards, community_cards, num_opponents, deck=base_deck)
+    if combos:
+        measured = (time.perf_counter() - started) * 1e6 / combos
+        _exact_us_per_combo[num_opponents] = (_exact_us_per_combo[num_opponents] + measured) / 2
+    return _point_estimate(equity, combos, "exact")
+
+
+def _point_estimate(win_prob, samples, source):
+    return {"win_prob": win_prob, "low": win_prob, "high": win_prob, "samples": samples, "source": source}
+
+
+def wilson_interval(successes, samples, z=WILSON_Z):
+    """Wilson score interval for a binomial proportion (ties count as half a success)."""
+    if not samples:
+        return 0.0, 1.0
+    p = successes / samples
+    denom = 1 + z * z / samples
+    centre = (p + z * z / (2 * samples)) / denom
+    margin = z * math.sqrt(p * (1 - p) / samples + z * z / (4 * samples * samples)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def is_decisive(estimate, thresholds):
+    """True once no decision threshold falls inside the estimate's interval."""
+    return not any(estimate["low"] < threshold < estimate["high"] for threshold in thresholds)
+
+
+@timing.timed("simulation.adaptive_win_prob")
+def adaptive_win_prob(
+    player_cards,
+    community_cards,
+    num_opponents=2,
+    thresholds=(),
+    max_iterations=20000,
+    budget_ms=None,
+    deck=None,
+    z=WILSON_Z,
+):
+    """
+    Sequential Monte Carlo: sample in ADAPTIVE_CHUNK steps and stop as soon as the
+    Wilson interval clears every decision threshold, after max_iterations, or when
+    budget_ms runs out. Returns {"win_prob", "low", "high", "samples", "source"}.
+    Clear-cut spots (say 95% vs a 0.7 threshold) stop after a chunk or two.
+    """
+    player_cards = cards.encode(player_cards)
+    community_cards = cards.encode(community_cards)
+    base_deck = cards.undealt(deck) if deck is not None else cards.remaining_deck(player_cards + community_cards)
+    deadline = _deadline(budget_ms)
+    known = _known_equity(player_cards, community_cards, num_opponents, base_deck, EXACT_COMBO_CAP, True, deadline)
+    if known is not None:
+        return known
+    return _sample_until(
+        player_cards, community_cards, num_opponents, base_deck, max_iterations, thresholds, deadline, z
+    )
+
+
+def _estimate_from_counts(wins, ties, total, z=WILSON_Z):
+    if not total:
+        return {"win_prob": 0.0, "low": 0.0, "high": 1.0, "samples": 0, "source": "monte_carlo"}
+    successes = wins + ties * 0.5
+    low, high = wilson_interval(successes, total, z)
+    return {"win_prob": successes / total, "low": low, "high": high, "samples": total, "source": "monte_carlo"}
+
+
+def _sample_until(
+    player_cards, community_cards, num_opponents, base_deck, max_iterations, thresholds, deadline, z=WILSON_Z
+):
+    """Sample ADAPTIVE_CHUNK at a time until decisive, max_iterations, or the perf_counter deadline."""
+    rng = _rng()
+    sampler = _simulate_batched if HAS_NUMPY else _simulate_loop
+    wins = ties = total = 0
+    while total < max_iterations:
+        chunk = int(min(ADAPTIVE_CHUNK, max_iterations - total))
+        chunk_wins, chunk_ties, chunk_total = sampler(
+            player_cards, community_cards, num_opponents, chunk, base_deck, rng=rng
+        )
+        wins += chunk_wins
+        ties += chunk_ties
+        total += chunk_total
+        if thresholds and is_decisive(_estimate_from_counts(wins, ties, total, z), thresholds):
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    return _estimate_from_counts(wins, ties, total, z)
+
+
+@timing.timed("simulation.cached_equity")
+def cached_equity(
+    player_cards, community_cards, num_opponents=2, iterations=400, thresholds=(), budget_ms=None
+):
+    """
+    adaptive_win_prob behind the equity cache (see equity_cache.get_cache). Spots are
+    keyed by equity_cache.canonical_spot, so suit-isomorphic spots share one result. The key
+    has no dead cards, so everything except hole and board counts as unseen. A cached
+    estimate that stopped early (thresholds or budget_ms) is reused only if it is
+    decisive for these thresholds too.
+    """
+    spot = equity_cache.canonical_spot(player_cards, community_cards, num_opponents)
+    key = equity_cache.spot_key(spot, iterations)
+    cache = equity_cache.get_cache()
+    estimate = cache.get(key)
+    if estimate is None or (estimate["samples"] < iterations and not is_decisive(estimate, thresholds)):
+        estimate = adaptive_win_prob(
+            player_cards,
+            community_cards,
+            num_opponents,
+            thresholds=thresholds,
+            max_iterations=iterations,
+            budget_ms=budget_ms,
+        )
+        cache.set(key, estimate)
+    return estimate
+
+
+def cached_win_prob(
+    player_cards, community_cards, num_opponents=2, iterations=400, thresholds=(), budget_ms=None
+):
+    """Win probability only; see cached_equity."""
+    estimate = cached_equity(player_cards, community_cards, num_opponents, iterations, thresholds, budget_ms)
+    return estimate["win_prob"]
+
+
+@timing.timed("simulation.multi_seat_equity")
+def multi_seat_equity(seats, community_cards, iterations=20000, budget_ms=None, use_cache=True):
+    """
+    Equity for several seats from one shared simulation. seats is a list of
+    (hole, num_opponents, thresholds). Each iteration samples one board plus one set of
+    random opponent hands from every card not on the board; every seat is scored once
+    on that board and compared with the first num_opponents of those hands. Iterations
+    that deal one of a seat's own hole cards are skipped for that seat, so each seat
+    sees exactly what estimate_win_prob would: only its own cards and the board, never
+    the other seats' hidden cards. Seats answered by the preflop table, exact
+    enumeration or the equity cache skip sampling. The rest sample until each has
+    iterations samples or is decisive for its thresholds, or at budget_ms.
+    Returns one estimate dict per seat (see adaptive_win_prob).
+    """
+    deadline = _deadline(budget_ms)
+    community_cards = cards.encode(community_cards)
+    holes = [cards.encode(hole) for hole, _, _ in seats]
+    base_deck = cards.remaining_deck(community_cards)
+    cache = equity_cache.get_cache() if use_cache else None
+
+    results = [None] * len(seats)
+    keys = [None] * len(seats)
+    pending = []
+    for idx, (_, num_opponents, thresholds) in enumerate(seats):
+        seat_deck = cards.remaining_deck(holes[idx] + community_cards)
+        known = _known_equity(
+            holes[idx], community_cards, num_opponents, seat_deck, EXACT_COMBO_CAP, True, deadline
+        )
+        if known is not None:
+            results[idx] = known
+            continue
+        if cache is not None:
+            spot = equity_cache.canonical_spot(holes[idx], community_cards, num_opponents)
+            keys[idx] = equity_cache.spot_key(spot, iterations)
+            cached = cache.get(keys[idx])
+            if cached is not None and (cached["samples"] >= iterations or is_decisive(cached, thresholds)):
+                results[idx] = cached
+                continue
+        pending.append(idx)
+    if not pending:
+        return results
+
+    rng = _rng()
+    sampler = _seat_counts_batched if HAS_NUMPY else _seat_counts_loop
+    counts = [[0, 0, 0] for _ in pending]
+    estimates = [_estimate_from_counts(0, 0, 0) for _ in pending]
+    total = 0
+    # Skipped iterations cost samples (about half for a hero facing four bots), so draw
+    # until every seat has iterations samples, within MAX_DRAW_FACTOR times that.
+    while min(seat_counts[2] for seat_counts in counts) < iterations and total < MAX_DRAW_FACTOR * iterations:
+        chunk = ADAPTIVE_CHUNK
+        chunk_counts = sampler(
+            [holes[idx] for idx in pending],
+            [seats[idx][1] for idx in pending],
+            community_cards,
+            chunk,
+            base_deck,
+            rng=rng,
+        )
+        for seat_counts, (wins, ties, seen) in zip(counts, chunk_counts):
+            seat_counts[0] += wins
+            seat_counts[1] += ties
+            seat_counts[2] += seen
+        total += chunk
+        estimates = [_estimate_from_counts(*seat_counts) for seat_counts in counts]
+        if all(seats[idx][2] and is_decisive(est, seats[idx][2]) for idx, est in zip(pending, estimates)):
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    for idx, estimate in zip(pending, estimates):
+        results[idx] = estimate
+        if cache is not None:
+            cache.set(keys[idx], estimate)
+    return results
+
+
+def _seat_counts_loop(seat_holes, opponent_counts, community_cards, iterations, base_deck, rng=random):
+    """
+    Pure Python shared sampler: [wins, ties, total] per seat. base_deck excludes only
+    the board; an iteration that deals one of a seat's hole cards does not count for it.
+    """
+    evaluate = hand_eval.evaluate
+    community_needed = 5 - len(community_cards)
+    draw_count = community_needed + 2 * max(opponent_counts)
+    counts = [[0, 0, 0] for _ in seat_holes]
+    hole_sets = [set(hole) for hole in seat_holes]
+    for _ in range(iterations):
+        drawn = rng.sample(base_deck, draw_count)
+        board = community_cards + drawn[:community_needed]
+        # best[k] is the best score among the first k + 1 random opponents.
+        best = []
+        for pos in range(community_needed, draw_count, 2):
+            score = evaluate(drawn[pos : pos + 2] + board)
+            best.append(score if not best or score > best[-1] else best[-1])
+        for seat_counts, hole, hole_set, num_opponents in zip(counts, seat_holes, hole_sets, opponent_counts):
+            if not hole_set.isdisjoint(drawn[: community_needed + 2 * num_opponents]):
+                continue
+            score = evaluate(hole + board)
+            seat_counts[2] += 1
+            if not num_opponents or score > best[num_opponents - 1]:
+                seat_counts[0] += 1
+            elif score == best[num_opponents - 1]:
+                seat_counts[1] += 1
+    return counts
+
+
+def _seat_counts_batched(seat_holes, opponent_counts, community_cards, iterations, base_deck, rng=None):
+    """Vectorized shared sampler: [wins, ties, total] per seat (see _seat_counts_loop)."""
+    rng = rng or _rng()
+    unseen = np.array(base_deck, dtype=np.int64)
+    community_needed = 5 - len(community_cards)
+    draw_count = community_needed + 2 * max(opponent_counts)
+    known_board = np.array(community_cards, dtype=np.int64)
+
+    drawn = _sample_batch(rng, unseen, iterations, draw_count)
+    board = np.hstack([np.broadcast_to(known_board, (iterations, len(known_board))), drawn[:, :community_needed]])
+    best = None
+    if draw_count > community_needed:
+        opp_scores = [
+            hand_eval.evaluate_batch(np.hstack([drawn[:, pos : pos + 2], board]))
+            for pos in range(community_needed, draw_count, 2)
+        ]
+        best = np.maximum.accumulate(np.array(opp_scores), axis=0)
+    counts = []
+    for hole, num_opponents in zip(seat_holes, opponent_counts):
+        used = drawn[:, : community_needed + 2 * num_opponents]
+        valid = ~np.isin(used, np.array(hole, dtype=np.int64)).any(axis=1)
+        seen = int(np.count_nonzero(valid))
+        if not num_opponents:
+            counts.append([seen, 0, seen])
+            continue
+        hole_arr = np.broadcast_to(np.array(hole, dtype=np.int64), (seen, len(hole)))
+        score = hand_eval.evaluate_batch(np.hstack([hole_arr, board[valid]]))
+        opp_best = best[num_opponents - 1][valid]
+        counts.append([int(np.count_nonzero(score > opp_best)), int(np.count_nonzero(score == opp_best)), seen])
+    return counts
+
+
+def _simulate_loop(player_cards, community_cards, num_opponents, iterations, base_deck, rng=random):
+    """Pure Python sampler: returns (wins, ties, total)."""
+    evaluate = hand_eval.evaluate
+    community_needed = 5 - len(community_cards)
+    draw_count = community_needed + 2 * num_opponents
     wins = ties = 0
     total = 0
     for _ in range(iterations):
-        shuffled = base_deck[:]
-        random.shuffle(shuffled)
+        drawn = rng.sample(base_deck, draw_count)
 
-        community_needed = 5 - len(community_cards)
-        community_draw = shuffled[:community_needed]
-        del shuffled[:community_needed]
+        board = community_cards + drawn[:community_needed]
+        pos = community_needed
 
-        opp_hands = []
+        player_score = evaluate(player_cards + board)
+        best_opp = None
         for _ in range(num_opponents):
-            opp_hand = shuffled[:2]
-            del shuffled[:2]
-            opp_hands.append(opp_hand)
-
-        board = list(community_cards) + community_draw
-        player_score = hand_eval.evaluate_best(player_cards + board)
-        opp_scores = [hand_eval.evaluate_best(hole + board) for hole in opp_hands]
-        best_opp = max(opp_scores) if opp_scores else None
+            opp_score = evaluate(drawn[pos : pos + 2] + board)
+            pos += 2
+            if best_opp is None or opp_score > best_opp:
+                best_opp = opp_score
 
         total += 1
         if best_opp is None or player_score > best_opp:
             wins += 1
         elif player_score == best_opp:
             ties += 1
+    return wins, ties, total
+
+
+def _sample_batch(rng, unseen, rows, draw_count):
+    """(rows, draw_count) matrix of distinct cards per row, in random order."""
+    if draw_count == 0:
+        return np.empty((rows, 0), dtype=unseen.dtype)
+    keys = rng.random((rows, len(unseen)), dtype=np.float32)
+    # The draw_count smallest keys pick the cards; sorting just those fixes their order.
+    picked = np.argpartition(keys, draw_count - 1, axis=1)[:, :draw_count]
+    order = np.argsort(np.take_along_axis(keys, picked, axis=1), axis=1)
+    return unseen[np.take_along_axis(picked, order, axis=1)]
+
+
+def _simulate_batched(player_cards, community_cards, num_opponents, iterations, base_deck, rng=None):
+    """Vectorized sampler: every iteration of a batch is dealt and scored with array ops."""
+    rng = rng or _rng()
+    unseen = np.array(base_deck, dtype=np.int64)
+    community_needed = 5 - len(community_cards)
+    draw_count = community_needed + 2 * num_opponents
+    hero = np.array(player_cards, dtype=np.int64)
+    known_board = np.array(community_cards, dtype=np.int64)
+
+    wins = ties = 0
+    done = 0
+    while done < iterations:
+        rows = min(BATCH_SIZE, iterations - done)
+        drawn = _sample_batch(rng, unseen, rows, draw_count)
+        board = np.hstack([np.broadcast_to(known_board, (rows, len(known_board))), drawn[:, :community_needed]])
+        player_score = hand_eval.evaluate_batch(np.hstack([np.broadcast_to(hero, (rows, len(hero))), board]))
+        if num_opponents:
+            best_opp = np.max(
+                [
+                    hand_eval.evaluate_batch(np.hstack([drawn[:, pos : pos + 2], board]))
+                    for pos in range(community_needed, draw_count, 2)
+                ],
+                axis=0,
+            )
+            wins += int(np.count_nonzero(player_score > best_opp))
+            ties += int(np.count_nonzero(player_score == best_opp))
+        else:
+            wins += rows
+        done += rows
+    return wins, ties, done
+
+
+def _get_pool(workers):
+    global _pool, _pool_pid, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid() or _pool_workers < workers:
+            if _pool is not None and _pool_pid == os.getpid():
+                _pool.shutdown(wait=False)
+            # spawn: workers only import the services package, and we avoid forking a
+            # process that may already run server threads.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+            _pool_workers = workers
+        return _pool
+
 
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _simulate_chunk(player_cards, community_cards, num_opponents, iterations, base_deck, seed):
+    """Pool entry point: one independently seeded slice of the iterations."""
+    if HAS_NUMPY:
+        rng = np.random.default_rng(seed)
+        return _simulate_batched(player_cards, community_cards, num_opponents, iterations, base_deck, rng=rng)
+    return _simulate_loop(
+        player_cards, community_cards, num_opponents, iterations, base_deck, rng=random.Random(seed)
+    )
+
+
+def _simulate_parallel(player_cards, community_cards, num_opponents, iterations, base_deck, workers):
+    """Split iterations across the process pool and merge the (wins, ties, total) counts."""
+    if _seeded_rng is not None:
+        seeds = [int(_seeded_rng.integers(2**63)) if HAS_NUMPY else _seeded_rng.getrandbits(63) for _ in range(workers)]
+    elif HAS_NUMPY:
+        seeds = np.random.SeedSequence().spawn(workers)
+    else:
+        seeds = [random.SystemRandom().getrandbits(64) for _ in range(workers)]
+    share, extra = divmod(iterations, workers)
+    futures = [
+        _get_pool(workers).submit(
+            _simulate_chunk,
+            player_cards,
+            community_cards,
+            num_opponents,
+            share + (1 if idx < extra else 0),
+            base_deck,
+            seed,
+        )
+        for idx, seed in enumerate(seeds)
+    ]
+    wins = ties = total = 0
+    for future in futures:
+        chunk_wins, chunk_ties, chunk_total = future.result()
+        wins += chunk_wins
+        ties += chunk_ties
+        total += chunk_total
+    return wins, ties, total
+
+
+def exact_combo_count(community_count, unseen_count, num_opponents):
+    """
+    Hand evaluations an exact enumeration needs (remaining boards x opponent holdings),
+    or None when the spot has too many opponents to enumerate.
+    """
+    if num_opponents > EXACT_MAX_OPPONENTS:
+        return None
+    community_needed = 5 - community_count
+    boards = math.comb(unseen_count, community_needed)
+    if not num_opponents:
+        return boards
+    return boards * math.comb(unseen_count - community_needed, 2)
+
+
+def exact_win_prob(player_cards, community_cards, num_opponents=1, deck=None):
+    """
+    Exact equity vs up to two opponents: every remaining board and every opponent
+    holding is enumerated once, so the result has no sampling variance.
+    """
+    player_cards = cards.encode(player_cards)
+    community_cards = cards.encode(community_cards)
+    unseen = cards.undealt(deck) if deck is not None else cards.remaining_deck(player_cards + community_cards)
+    if num_opponents > EXACT_MAX_OPPONENTS:
+        raise ValueError(f"exact equity supports at most {EXACT_MAX_OPPONENTS} opponents")
+
+    wins = ties = total = 0
+    for runout in itertools.combinations(unseen, 5 - len(community_cards)):
+        board = community_cards + list(runout)
+        player_score = hand_eval.evaluate(player_cards + board)
+        if not num_opponents:
+            wins += 1
+            total += 1
+            continue
+        rest = [card for card in unseen if card not in runout]
+        holdings = list(itertools.combinations(rest, 2))
+        scores = _score_holdings(holdings, board)
+        below = [hole for hole, score in zip(holdings, scores) if score < player_score]
+        at_most = [hole for hole, score in zip(holdings, scores) if score <= player_score]
+        if num_opponents == 1:
+            wins += len(below)
+            ties += len(at_most) - len(below)
+            total += len(holdings)
+        else:
+            # Hero wins when both opponents are below, ties when the best one matches.
+            win_pairs = _disjoint_pairs(below)
+            wins += win_pairs
+            ties += _disjoint_pairs(at_most) - win_pairs
+            total += _disjoint_pairs(holdings)
     return (wins + ties * 0.5) / total if total else 0.0
+
+
+def _score_holdings(holdings, board):
+    if HAS_NUMPY:
+        rows = np.hstack([np.array(holdings, dtype=np.int64), np.broadcast_to(board, (len(holdings), len(board)))])
+        return hand_eval.evaluate_batch(rows).tolist()
+    return [hand_eval.evaluate(list(hole) + board) for hole in holdings]
+
+
+def _disjoint_pairs(holdings):
+    """Unordered pairs of holdings that share no card."""
+    per_card = Counter()
+    for first, second in holdings:
+        per_card[first] += 1
+        per_card[second] += 1
+    count = len(holdings)
+    # Ordered pairs minus those sharing a card (each holding shares both its cards with itself).
+    return (count * count - sum(n * n for n in per_card.values()) + count) // 2
@@ -1,16 +1,22 @@
-from . import cards
+from . import cards, hand_state, state_codec, timing
 import random
 
 DEFAULT_STACK = 500
 DEFAULT_BOTS = 4
+# Session keeps only the newest log lines; full hands live in services.history.
+LOG_RING = 20
 
 
 def new_game(num_bots=DEFAULT_BOTS):
     return new_hand(num_bots=num_bots)
 
 
-def new_hand(prev_state=None, num_bots=DEFAULT_BOTS, starting_stack=DEFAULT_STACK):
-    """Start a fresh hand; reuse existing stacks if prev_state is provided."""
+@timing.timed("state.new_hand")
+def new_hand(prev_state=None, num_bots=DEFAULT_BOTS, starting_stack=DEFAULT_STACK, seed=None):
+    """
+    Start a fresh hand; reuse existing stacks if prev_state is provided.
+    Pass the deck seed of an earlier hand to replay its cards.
+    """
     # Always seat DEFAULT_BOTS to avoid carrying over larger tables from prior state
     num_bots = DEFAULT_BOTS
     player_first = random.choice([True, False])
@@ -22,8 +28,7 @@ def new_hand(prev_state=None, num_bots=DEFAULT_BOTS, starting_stack=DEFAULT_STAC
         player_stack = starting_stack
         bot_stacks = [starting_stack] * num_bots
 
-    deck = cards.new_deck()
-    cards.shuffle(deck)
+    deck = cards.seeded_deck(seed)
 
     player_hand = cards.draw(deck, 2)
     bots = []
@@ -36,16 +41,20 @@ def new_hand(prev_state=None, num_bots=DEFAULT_BOTS, starting_stack=DEFAULT_STAC
             {
                 "name": f"Bot {idx + 1}",
                 "hand": bot_hand,
+                "hs": hand_state.HandState(bot_hand).to_list(),
                 "stack": stack_val,
                 "folded": False,
             }
         )
 
     state = {
+        # Sent to the browser, so never derived from the deck seed (which deals every card).
+        "hand_id": random.getrandbits(63),
         "deck": deck,
         "player": {
             "name": "You",
             "hand": player_hand,
+            "hs": hand_state.HandState(player_hand).to_list(),
             "stack": player_stack,
             "folded": False,
             "all_in": False,
@@ -57,6 +66,8 @@ def new_hand(prev_state=None, num_bots=DEFAULT_BOTS, starting_stack=DEFAULT_STAC
         "pending_call": 0,  # amount player must call to see next card
         "raise_done": False,  # cap raises per street
         "log": ["New hand started."],
+        "log_offset": 0,  # seq of log[0] within the hand
+        "log_saved": 0,  # seq up to which lines are in the history store
         "last_advice": None,
         "player_first": player_first,
         "opening_done": False,
@@ -64,12 +75,83 @@ def new_hand(prev_state=None, num_bots=DEFAULT_BOTS, starting_stack=DEFAULT_STAC
     return state
 
 
+def _map_cards(state, convert):
+    """Apply convert to every card list in state (hands, board, deck) in place."""
+    if "deck" in state and not isinstance(state["deck"], dict):  # seeded decks hold no cards
+        state["deck"] = convert(state["deck"] or [])
+    state["community"] = convert(state.get("community") or [])
+    state["player"]["hand"] = convert(state["player"].get("hand") or [])
+    for bot in state.get("bots", []):
+        bot["hand"] = convert(bot.get("hand") or [])
+    return state
+
+
+@timing.timed("state.load")
 def load(session):
     state = session.get("game_state")
+    if isinstance(state, str):
+        state = state_codec.decode(state)
     if state and len(state.get("bots", [])) > DEFAULT_BOTS:
         state["bots"] = state["bots"][:DEFAULT_BOTS]
+    if state:
+        # Sessions written before the int encoding still hold "AS"-style strings.
+        _map_cards(state, cards.encode)
+        deck = state.get("deck")
+        seed = deck.get("seed") if isinstance(deck, dict) else None
+        # Sessions from before the history store have none; earlier ones reused the seed.
+        if "hand_id" not in state or state["hand_id"] == seed:
+            state["hand_id"] = random.getrandbits(63)
+    return state
+
+
+def trim_log(state, keep=LOG_RING):
+    """Drop the oldest log lines beyond `keep`, but never ones not yet in the history store."""
+    log = state.get("log") or []
+    offset = state.get("log_offset", 0)
+    drop = min(len(log) - keep, state.get("log_saved", 0) - offset)
+    if drop > 0:
+        state["log"] = log[drop:]
+        state["log_offset"] = offset + drop
     return state
 
 
+@timing.timed("state.save")
 def save(session, state):
-    session["game_state"] = state
+    """
+    Store state in the session as a compact state_codec string, log trimmed to its
+    ring. Skips the write (and returns False) when the encoded state is unchanged,
+    so the session is not marked modified; otherwise bumps state["version"], the
+    number clients quote to receive deltas.
+    """
+    trim_log(state)
+    stored = session.get("game_state")
+    if isinstance(stored, str) and state_codec.encode(state) == stored:
+        return False
+    state["version"] = state.get("version", 0) + 1
+    session["game_state"] = state_codec.encode(state)
+    return True
+
+
+# Server-side bookkeeping never sent to the browser: the deck (it would reveal the
+# runout), hand states and the street equity memo.
+_SERVER_ONLY = ("deck", "street_equity", "log_saved")
+
+
+def to_client(state):
+    """
+    Copy of state for JSON responses and templates: cards as "AS"-style strings,
+    no deck, and bot hole cards only once the table reveals them (hand over or
+    hero folded).
+    """
+    if not state:
+        return state
+    client = {key: value for key, value in state.items() if key not in _SERVER_ONLY}
+    client["version"] = state.get("version", 0)
+    if "hand_id" in state:
+        client["hand_id"] = str(state["hand_id"])  # 63-bit; too wide for a JS number
+    reveal = state.get("street") == "hand_over" or state["player"].get("folded")
+    client["player"] = {k: v for k, v in state["player"].items() if k != "hs"}
+    client["bots"] = [
+        {k: (v if k != "hand" or reveal else []) for k, v in bot.items() if k != "hs"} for bot in state.get("bots", [])
+    ]
+    return _map_cards(client, cards.decode)
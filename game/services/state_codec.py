@@ -0,0 +1,196 @@
+import base64
+import json
+import math
+import struct
+import zlib
+
+from . import cards
+
+# Layout of an encoded state (before base85, which keeps it a JSON-safe session string):
+#   version byte | header struct | card sections | street equity | raw deflate(JSON of everything else)
+# Bump VERSION on any layout change; decode() returns None for versions it does not know.
+# Version 2 added the seeded deck section, version 3 the binary street equity memo;
+# older payloads still decode.
+VERSION = 3
+_READABLE = (1, 2, 3)
+STREETS = ("preflop", "flop", "turn", "river", "hand_over")
+SOURCES = ("monte_carlo", "exact", "table")
+
+# Preset zlib dictionary of text that recurs in every state (advice boilerplate, log
+# phrases, key names). Part of the format: changing it requires a VERSION bump.
+_ZDICT = (
+    b"New hand started.You folded. Hand ends.You go all-in for You raise You call You check."
+    b" folds. calls all-in for  goes all-in for  raises  calls  checks (all-in). is all-in."
+    b"Flop dealt.Turn dealt.River dealt.Showdown: you win the pot!Showdown: split pot between  win(s)."
+    b" shows  receives high cardpairtwo pairthree of a kindstraightflushfull housefour of a kindstraight flush"
+    b'"source":"monte_carlo""source":"exact""source":"table""samples":"low":"high":'
+    b'"street_equity":{"key":[,"hero":{"win_prob":0.,"bots":[null,0.'
+    b'"last_equity":0.,"last_equity_samples":,"last_policy":{"action":"check","reason":"best hand: '
+    b'"last_advice":{"win_prob":,"suggested_action":"fold/check","call/check","raise",'
+    b'"message":"Est. win chance %. Low equity; conserve chips unless odds are exceptional.'
+    b"Playable equity; realize your hand without inflating the pot."
+    b'Strong equity; pressure the bots and build the pot. Pot , to call .",'
+    b'"explanation":"Win estimate % on the preflop: no board yet, best made hand ,'
+    b" community card(s) shown, best made hand , versus  active bot(s). Monte Carlo sim fills"
+    b" remaining cards and deals bot hole cards; more opponents and weaker made strength lower"
+    b" equity. Probabilities refresh each street as more cards are known. Policy hint: check - "
+    b'best hand: high card / equity: % AI guidance: AI tip pending...","pot":,"to_call":,'
+    b'"ai_note":"AI tip pending..."},"log":["New hand started.","Bot 1 ","Bot 2 ","Bot 3 ","Bot 4 "'
+)
+_HEADER = struct.Struct("<BBiIIB")  # street, flags, player stack, pot, pending_call, bot count
+_BOT = struct.Struct("<iB")  # stack, flags
+_SEEDED = 0xFF  # deck section marker: seed + cursor follow instead of a card list
+_SEEDED_DECK = struct.Struct("<QB")  # seed, cursor
+# Street equity memo: board size and live bots (its key), hero flag, bot count; then the
+# hero's win_prob, low, high, samples, source and one win_prob per bot (NaN for None).
+# Win probabilities stay doubles since decisions compare them against thresholds; the
+# interval bounds are only reported, so single precision does.
+_EQUITY = struct.Struct("<BBBB")
+_EQUITY_HERO = struct.Struct("<dffIB")
+_FLAGS = ("raise_done", "player_first", "opening_done")
+_SEAT_FLAGS = ("folded", "all_in")
+# Keys held in the binary part.
+_PACKED_KEYS = {"deck", "community", "street", "pot", "pending_call", "player", "bots", "log", "street_equity"}
+_PACKED_KEYS |= set(_FLAGS)
+_SEAT_KEYS = {"name", "hand", "stack"} | set(_SEAT_FLAGS)
+# Never stored: hand states ("hs") are a per-request memo that hand_state.for_seat
+# rebuilds from at most seven cards, cheaper than the bytes they would take.
+_TRANSIENT_SEAT_KEYS = {"hs"}
+
+
+def _bits(source, names):
+    return sum(1 << idx for idx, name in enumerate(names) if source.get(name))
+
+
+def _unbits(value, names):
+    return {name: bool(value >> idx & 1) for idx, name in enumerate(names)}
+
+
+def _cards_bytes(card_list):
+    return bytes([len(card_list)]) + bytes(cards.encode(card_list))
+
+
+def _deck_bytes(deck):
+    if isinstance(deck, dict):
+        return bytes([_SEEDED]) + _SEEDED_DECK.pack(deck["seed"], deck["cursor"])
+    return _cards_bytes(deck or [])
+
+
+def _seat_extras(seat, default_name):
+    extras = {key: value for key, value in seat.items() if key not in _SEAT_KEYS and key not in _TRANSIENT_SEAT_KEYS}
+    if seat.get("name", default_name) != default_name:
+        extras["name"] = seat["name"]
+    return extras
+
+
+def _equity_bytes(memo):
+    if not memo:
+        return b"\xff"  # no memo (a board size byte is at most 5)
+    hero = memo.get("hero")
+    bots = memo.get("bots") or []
+    out = _EQUITY.pack(memo["key"][0], memo["key"][1], hero is not None, len(bots))
+    if hero is not None:
+        out += _EQUITY_HERO.pack(
+            hero["win_prob"], hero["low"], hero["high"], hero["samples"], SOURCES.index(hero["source"])
+        )
+    return out + struct.pack(f"<{len(bots)}d", *(math.nan if value is None else value for value in bots))
+
+
+def _read_equity(data, offset):
+    if data[offset] == 0xFF:
+        return None, offset + 1
+    board, live, has_hero, bot_count = _EQUITY.unpack_from(data, offset)
+    offset += _EQUITY.size
+    hero = None
+    if has_hero:
+        win_prob, low, high, samples, source = _EQUITY_HERO.unpack_from(data, offset)
+        hero = {"win_prob": win_prob, "low": low, "high": high, "samples": samples, "source": SOURCES[source]}
+        offset += _EQUITY_HERO.size
+    bots = [None if math.isnan(value) else value for value in struct.unpack_from(f"<{bot_count}d", data, offset)]
+    return {"key": [board, live], "hero": hero, "bots": bots}, offset + 8 * bot_count
+
+
+def encode(state):
+    """Pack a game state into a compact string for the session."""
+    player = state["player"]
+    bots = state.get("bots", [])
+    out = bytearray([VERSION])
+    out += _HEADER.pack(
+        STREETS.index(state.get("street", "preflop")),
+        _bits(state, _FLAGS) | _bits(player, _SEAT_FLAGS) << len(_FLAGS),
+        player.get("stack", 0),
+        state.get("pot", 0),
+        state.get("pending_call", 0),
+        len(bots),
+    )
+    out += _deck_bytes(state.get("deck"))
+    out += _cards_bytes(state.get("community") or [])
+    out += _cards_bytes(player.get("hand") or [])
+    for bot in bots:
+        out += _BOT.pack(bot.get("stack", 0), _bits(bot, _SEAT_FLAGS))
+        out += _cards_bytes(bot.get("hand") or [])
+    out += _equity_bytes(state.get("street_equity"))
+
+    rest = {key: value for key, value in state.items() if key not in _PACKED_KEYS}
+    rest["log"] = list(state.get("log") or [])  # already a bounded ring (state.trim_log)
+    seats = [_seat_extras(player, "You")] + [_seat_extras(bot, f"Bot {idx + 1}") for idx, bot in enumerate(bots)]
+    if any(seats):
+        rest["seats"] = seats
+    packer = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=_ZDICT)
+    out += packer.compress(json.dumps(rest, separators=(",", ":")).encode("utf-8")) + packer.flush()
+    return base64.b85encode(bytes(out)).decode("ascii")
+
+
+def _read_cards(data, offset):
+    count = data[offset]
+    return list(data[offset + 1 : offset + 1 + count]), offset + 1 + count
+
+
+def _read_deck(data, offset):
+    if data[offset] == _SEEDED:
+        seed, cursor = _SEEDED_DECK.unpack_from(data, offset + 1)
+        return {"seed": seed, "cursor": cursor}, offset + 1 + _SEEDED_DECK.size
+    return _read_cards(data, offset)
+
+
+def decode(payload):
+    """Inverse of encode(); None if the payload is from an unknown codec version."""
+    data = base64.b85decode(payload)
+    if not data or data[0] not in _READABLE:
+        return None
+    street, flags, player_stack, pot, pending_call, bot_count = _HEADER.unpack_from(data, 1)
+    offset = 1 + _HEADER.size
+    deck, offset = _read_deck(data, offset)
+    community, offset = _read_cards(data, offset)
+    player_hand, offset = _read_cards(data, offset)
+    player = {"name": "You", "hand": player_hand, "stack": player_stack}
+    player.update(_unbits(flags >> len(_FLAGS), _SEAT_FLAGS))
+    bots = []
+    for idx in range(bot_count):
+        stack, bot_flags = _BOT.unpack_from(data, offset)
+        hand, offset = _read_cards(data, offset + _BOT.size)
+        bot = {"name": f"Bot {idx + 1}", "hand": hand, "stack": stack}
+        bot.update(_unbits(bot_flags, _SEAT_FLAGS))
+        bots.append(bot)
+    street_equity = None
+    if data[0] >= 3:
+        street_equity, offset = _read_equity(data, offset)
+
+    unpacker = zlib.decompressobj(-15, zdict=_ZDICT)
+    rest = json.loads((unpacker.decompress(data[offset:]) + unpacker.flush()).decode("utf-8"))
+    for seat, extras in zip([player] + bots, rest.pop("seats", [])):
+        seat.update(extras)
+    state = {
+        "deck": deck,
+        "player": player,
+        "bots": bots,
+        "community": community,
+        "street": STREETS[street],
+        "pot": pot,
+        "pending_call": pending_call,
+    }
+    if street_equity is not None:
+        state["street_equity"] = street_equity
+    state.update(_unbits(flags, _FLAGS))
+    state.update(rest)
+    return state
@@ -0,0 +1,88 @@
+from . import state as state_svc
+from . import timing
+
+SESSION_KEY = "game_state"
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class SessionStore:
+    """
+    Game state in request.session (state.load/state.save). Whether that hits the DB,
+    the cache or both is up to SESSION_ENGINE (db, cached_db, cache).
+    """
+
+    name = "session"
+
+    def load(self, request):
+        return state_svc.load(request.session)
+
+    def save(self, request, state):
+        return state_svc.save(request.session, state)
+
+
+class CacheStore:
+    """
+    Game state in a django.core.cache alias keyed by user, so gameplay never writes
+    the session row. Point the alias at redis/memcached when running several workers;
+    an evicted entry just means a fresh game.
+    """
+
+    name = "cache"
+
+    def __init__(self, alias="default", ttl=DEFAULT_TTL):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def _key(self, request):
+        return f"game-state:{request.user.pk}"
+
+    def load(self, request):
+        payload = self.cache.get(self._key(request))
+        request._game_state_payload = payload
+        if payload is None:
+            # First visit with this store: pick up a game left in the session.
+            return state_svc.load(request.session)
+        return state_svc.load({SESSION_KEY: payload})
+
+    def save(self, request, state):
+        holder = {SESSION_KEY: getattr(request, "_game_state_payload", None)}
+        if not state_svc.save(holder, state):
+            return False
+        request._game_state_payload = holder[SESSION_KEY]
+        self.cache.set(self._key(request), holder[SESSION_KEY], timeout=self.ttl)
+        return True
+
+
+_store = None
+
+
+def get_store():
+    """Store named by settings.GAME_STATE_STORE: "session" (default) or "cache"."""
+    global _store
+    if _store is None:
+        from django.conf import settings
+
+        if getattr(settings, "GAME_STATE_STORE", "session") == "cache":
+            _store = CacheStore(
+                getattr(settings, "GAME_STATE_CACHE", "default"), getattr(settings, "GAME_STATE_TTL", DEFAULT_TTL)
+            )
+        else:
+            _store = SessionStore()
+    return _store
+
+
+@timing.timed("state_store.load")
+def load(request):
+    return get_store().load(request)
+
+
+@timing.timed("state_store.save")
+def save(request, state):
+    """Persist state if it changed since it was loaded; returns True when it was written."""
+    return get_store().save(request, state)
@@ -0,0 +1,119 @@
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# Per-process window of recent requests kept for stats().
+STATS_WINDOW = 2000
+
+# Span totals for the request being handled: {name: [total_ms, count]}, or None
+# when timing is off so span()/timed() cost one ContextVar lookup.
+_current = contextvars.ContextVar("timing_spans", default=None)
+_NOOP = nullcontext()
+_history = {}  # span name -> deque of per-request totals (ms)
+_history_lock = threading.Lock()
+
+
+class _Span:
+    __slots__ = ("name", "spans", "started")
+
+    def __init__(self, spans, name):
+        self.spans = spans
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.started) * 1000
+        entry = self.spans.get(self.name)
+        if entry is None:
+            self.spans[self.name] = [elapsed, 1]
+        else:
+            entry[0] += elapsed
+            entry[1] += 1
+        return False
+
+
+def span(name):
+    """Context manager adding the block's wall time to span `name` of the current request."""
+    spans = _current.get()
+    if spans is None:
+        return _NOOP
+    return _Span(spans, name)
+
+
+def timed(name):
+    """Decorator form of span()."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            spans = _current.get()
+            if spans is None:
+                return fn(*args, **kwargs)
+            with _Span(spans, name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def start():
+    """Begin collecting spans for this request/context; returns the token for finish()."""
+    return _current.set({})
+
+
+def finish(token):
+    """Stop collecting, record the totals for stats() and return {name: (ms, count)}."""
+    spans = _current.get() or {}
+    _current.reset(token)
+    result = {name: (round(total, 3), count) for name, (total, count) in spans.items()}
+    record(result)
+    return result
+
+
+def record(spans):
+    with _history_lock:
+        for name, (total, _count) in spans.items():
+            window = _history.get(name)
+            if window is None:
+                window = _history[name] = deque(maxlen=STATS_WINDOW)
+            window.append(total)
+
+
+def server_timing(spans):
+    """Format spans as a Server-Timing header value."""
+    return ", ".join(
+        f'{name.replace(".", "-")};dur={total:.2f};desc="{name} x{count}"' for name, (total, count) in spans.items()
+    )
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def stats():
+    """p50/p95/p99 (ms) of each span's per-request total over the recent window."""
+    with _history_lock:
+        snapshot = {name: sorted(window) for name, window in _history.items()}
+    return {
+        name: {
+            "requests": len(ordered),
+            "p50": round(_percentile(ordered, 50), 3),
+            "p95": round(_percentile(ordered, 95), 3),
+            "p99": round(_percentile(ordered, 99), 3),
+            "max": round(ordered[-1], 3),
+        }
+        for name, ordered in sorted(snapshot.items())
+        if ordered
+    }
+
+
+def reset():
+    with _history_lock:
+        _history.clear()
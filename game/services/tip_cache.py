@@ -0,0 +1,192 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from . import cards, equity_cache, hand_eval, hand_state, policy
+
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL = 6 * 3600  # seconds
+# Bump when the spot prompt (llm.summarize_spot) or the buckets change.
+KEY_VERSION = 1
+EQUITY_BUCKET = 5  # percentage points
+POT_ODDS_BUCKET = 10  # percentage points
+
+# Spot key -> Inflight of the tip being generated, so concurrent requests for the
+# same spot in this process share one model call (and its tokens as they arrive).
+_inflight = {}
+_inflight_lock = threading.Lock()
+coalesced = 0
+
+
+def _starting_hand(hole):
+    if hole[0] >> 2 == hole[1] >> 2:
+        return "pocket pair"
+    return "suited cards" if hole[0] & 3 == hole[1] & 3 else "offsuit cards"
+
+
+def canonical_spot(state, win_prob, policy_hint):
+    """
+    What a tip depends on, bucketed so near-identical decisions share one tip:
+    street, made-hand class plus draws, equity, the policy action and pot odds.
+    """
+    player = state.get("player", {})
+    hs = hand_state.for_seat(player, state.get("community") or [])
+    draws = "+".join(name for name, on in (("fd", hs.flush_draw), ("sd", hs.straight_draw)) if on)
+    pending = state.get("pending_call", 0)
+    pot = state.get("pot", 0)
+    pot_odds = pending * 100 // (pot + pending) if pending else 0
+    if hs.count < 5:
+        hole = cards.encode(player.get("hand") or [])
+        hand = _starting_hand(hole) if len(hole) == 2 else "unknown"
+    else:
+        hand = policy.hand_eval_rank_label(hand_eval.score_category(hs.best))
+    return {
+        "street": state.get("street", "preflop"),
+        "hand": hand,
+        "draws": draws,
+        "equity": int(win_prob * 100) // EQUITY_BUCKET * EQUITY_BUCKET,
+        "action": (policy_hint or {}).get("action", "check"),
+        "pot_odds": pot_odds // POT_ODDS_BUCKET * POT_ODDS_BUCKET,
+    }
+
+
+def spot_key(spot):
+    """Versioned string key, e.g. "tip1:flop:pair:fd:45:call:20"."""
+    return "tip{}:{street}:{hand}:{draws}:{equity}:{action}:{pot_odds}".format(KEY_VERSION, **spot).replace(" ", "_")
+
+
+async def stream(spot, source, follow=True):
+    """
+    Yield tip fragments for a spot. A cached tip comes back as one fragment; if the
+    same spot is already being generated in this process, follow that call's
+    fragments (those so far, then each as it arrives) unless follow is False;
+    otherwise stream source() (an async iterator of fragments) and cache the
+    finished tip. Yields nothing when no tip could be produced.
+    """
+    key = spot_key(spot)
+    cache = get_cache()
+    note = cache.get(key)
+    if note is not None:
+        yield note
+        return
+
+    pending, leader = claim(key)
+    if not leader:
+        if follow:
+            async for fragment in pending.follow():
+                yield fragment
+        return
+
+    parts = []
+    note = None
+    try:
+        async for fragment in source():
+            parts.append(fragment)
+            pending.publish(fragment)
+            yield fragment
+        note = "".join(parts).strip() or None
+        if note:
+            cache.set(key, note)
+    finally:
+        resolve(key, pending, note)
+
+
+class Inflight:
+    """
+    A tip being generated: the leader publish()es fragments and finish()es; any
+    number of followers, on any thread or event loop, replay and then tail them.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.done = False
+        self.note = None
+        self._lock = threading.Lock()
+        self._wakeups = []  # concurrent Futures of followers waiting for more
+
+    def _wake(self):
+        wakeups, self._wakeups = self._wakeups, []
+        for wakeup in wakeups:
+            wakeup.set_result(None)
+
+    def publish(self, fragment):
+        with self._lock:
+            self.parts.append(fragment)
+            self._wake()
+
+    def finish(self, note):
+        with self._lock:
+            self.done, self.note = True, note
+            self._wake()
+
+    async def follow(self):
+        """Yield every fragment, waiting for new ones until the leader finishes."""
+        seen = 0
+        while True:
+            with self._lock:
+                fresh, done = self.parts[seen:], self.done
+                if not fresh and not done:
+                    wakeup = Future()
+                    self._wakeups.append(wakeup)
+            for fragment in fresh:
+                yield fragment
+            seen += len(fresh)
+            if fresh:
+                continue
+            if done:
+                return
+            await asyncio.wrap_future(wakeup)
+
+
+def claim(key):
+    """
+    (Inflight, leader) for generating the tip for key. The leader must resolve() it
+    when done; everyone else follows it.
+    """
+    global coalesced
+    with _inflight_lock:
+        pending = _inflight.get(key)
+        if pending is not None:
+            coalesced += 1
+            return pending, False
+        pending = _inflight[key] = Inflight()
+        return pending, True
+
+
+def resolve(key, pending, note):
+    """Hand the finished tip (or None) to the followers of a claim()."""
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    pending.finish(note)
+
+
+def stats():
+    return dict(get_cache().stats(), coalesced=coalesced, inflight=len(_inflight))
+
+
+_backend = None
+
+
+def get_cache():
+    """
+    Tip cache: settings.TIP_CACHE_BACKEND names a CACHES alias to share tips across
+    workers, or "memory" for a per-process LRU of TIP_CACHE_MAX_ENTRIES.
+    """
+    global _backend
+    if _backend is None:
+        from django.conf import settings
+
+        alias = getattr(settings, "TIP_CACHE_BACKEND", "memory") if settings.configured else "memory"
+        ttl = getattr(settings, "TIP_CACHE_TTL", DEFAULT_TTL) if settings.configured else DEFAULT_TTL
+        if alias == "memory":
+            max_entries = getattr(settings, "TIP_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+            _backend = equity_cache.LRUCache(max_entries=max_entries, ttl=ttl)
+        else:
+            _backend = equity_cache.DjangoCacheBackend(alias, ttl=ttl, local_entries=256)
+    return _backend
+
+
+def set_cache(backend):
+    """Swap the active backend (None re-reads settings on next use)."""
+    global _backend
+    _backend = backend
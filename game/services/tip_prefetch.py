@@ -0,0 +1,118 @@
+import contextvars
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from . import llm, llm_router, timing, tip_cache
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_QUEUED = 64  # jobs waiting or running across all users
+DEFAULT_PER_USER = 2  # jobs waiting or running per user
+
+# Who the advice being computed belongs to (set by the views); ensure_advice calls
+# outside an owner() block, e.g. self-play, never prefetch.
+_owner = contextvars.ContextVar("tip_prefetch_owner", default=None)
+_lock = threading.RLock()  # cancel() runs _finished() in the caller, under the lock
+_executor = None
+_latest = {}  # owner -> (spot key, future) of their most recent job
+_active = Counter()  # owner -> jobs waiting or running
+_counts = Counter()  # submitted / skipped_busy / skipped_limit / cancelled / done
+
+
+@contextmanager
+def owner(user_id):
+    """Attribute ensure_advice calls in this block to user_id for prefetching."""
+    token = _owner.set(user_id)
+    try:
+        yield
+    finally:
+        _owner.reset(token)
+
+
+def _settings():
+    from django.conf import settings
+
+    if not settings.configured:
+        return True, DEFAULT_WORKERS, DEFAULT_MAX_QUEUED, DEFAULT_PER_USER
+    return (
+        getattr(settings, "TIP_PREFETCH", True),
+        getattr(settings, "TIP_PREFETCH_WORKERS", DEFAULT_WORKERS),
+        getattr(settings, "TIP_PREFETCH_MAX_QUEUED", DEFAULT_MAX_QUEUED),
+        getattr(settings, "TIP_PREFETCH_PER_USER", DEFAULT_PER_USER),
+    )
+
+
+def _pool(workers):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tip-prefetch")
+    return _executor
+
+
+async def _generate(spot):
+    prompt = llm.summarize_spot(spot)
+    async for _fragment in tip_cache.stream(spot, lambda: llm_router.stream(prompt), follow=False):
+        pass
+
+
+def _run(key, spot):
+    """
+    Worker: generate the tip into tip_cache unless it is cached or already being
+    generated. Uses tip_cache.stream like /ai-tip/, so a request arriving mid-way
+    follows the tokens as they come in.
+    """
+    if tip_cache.get_cache().get(key) is not None:
+        return
+    llm.run(_generate(spot))
+
+
+def _finished(user_id, future):
+    with _lock:
+        _active[user_id] -= 1
+        if _active[user_id] <= 0:
+            del _active[user_id]
+        if _latest.get(user_id, (None, None))[1] is future:
+            del _latest[user_id]
+        _counts["cancelled" if future.cancelled() else "done"] += 1
+
+
+@timing.timed("tip_prefetch.submit")
+def submit(state, win_prob, policy_hint):
+    """
+    Queue generation of the tip for this spot so /ai-tip/ only has to collect it.
+    The owner's previous job is cancelled if it has not started (its state is
+    superseded). Returns False when there is no owner, the spot is already cached
+    or queued, or the queue or the owner's concurrency limit is full.
+    """
+    user_id = _owner.get()
+    enabled, workers, max_queued, per_user = _settings()
+    if user_id is None or not enabled:
+        return False
+    spot = tip_cache.canonical_spot(state, win_prob, policy_hint)
+    key = tip_cache.spot_key(spot)
+    if tip_cache.get_cache().get(key) is not None:
+        return False
+    with _lock:
+        previous = _latest.get(user_id)
+        if previous is not None:
+            if previous[0] == key:
+                return False
+            previous[1].cancel()  # no-op once running; its tip still lands in the cache
+        if sum(_active.values()) >= max_queued:
+            _counts["skipped_busy"] += 1
+            return False
+        if _active[user_id] >= per_user:
+            _counts["skipped_limit"] += 1
+            return False
+        future = _pool(workers).submit(_run, key, spot)
+        _latest[user_id] = (key, future)
+        _active[user_id] += 1
+        _counts["submitted"] += 1
+    future.add_done_callback(lambda done: _finished(user_id, done))
+    return True
+
+
+def stats():
+    with _lock:
+        return dict(_counts, active=sum(_active.values()), users=len(_active))
@@ -1,3 +1,636 @@
-from django.test import TestCase
+import base64
+import copy
+import itertools
+import random
+import socket
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from . import benchmarks
+from .middleware import TimingMiddleware
+from .services import (
+    breaker,
+    cards,
+    delta,
+    equity_cache,
+    hand_eval,
+    hand_state,
+    history,
+    llm,
+    llm_router,
+    preflop,
+    selfplay,
+    simulation,
+    state,
+    state_codec,
+    state_store,
+    timing,
+    tip_cache,
+    tip_prefetch,
+)
+
+
+def _reference_score(hand):
+    """Best packed score by brute force over every 5-card subset with score_five."""
+    return max(hand_eval.pack_score(hand_eval.score_five(combo)) for combo in itertools.combinations(hand, 5))
+
+
+class HandEvalTests(SimpleTestCase):
+    def setUp(self):
+        self.rng = random.Random(2024)
+
+    def _hands(self, size, count=1500):
+        return [self.rng.sample(range(52), size) for _ in range(count)]
+
+    def test_evaluate_matches_score_five(self):
+        for size in (5, 6, 7):
+            for hand in self._hands(size):
+                self.assertEqual(hand_eval.evaluate(hand), _reference_score(hand), hand)
+
+    def test_evaluate_covers_every_category(self):
+        # Random deals rarely hit quads or straight flushes; pin one of each category.
+        hands = [
+            ["2C", "5D", "9H", "JS", "KC", "3D", "7H"],  # high card
+            ["2C", "2D", "9H", "JS", "KC", "3D", "7H"],  # pair
+            ["2C", "2D", "9H", "9S", "KC", "3D", "7H"],  # two pair
+            ["2C", "2D", "2H", "9S", "KC", "3D", "7H"],  # trips
+            ["AC", "2D", "3H", "4S", "5C", "9D", "KH"],  # wheel straight
+            ["2C", "5C", "9C", "JC", "KC", "3D", "7H"],  # flush
+            ["2C", "2D", "2H", "9S", "9C", "3D", "7H"],  # full house
+            ["2C", "2D", "2H", "2S", "KC", "3D", "7H"],  # quads
+            ["9H", "TH", "JH", "QH", "KH", "AH", "2C"],  # straight flush
+        ]
+        for category, hand in enumerate(hands):
+            ints = [hand_eval.cards_mod.to_int(card) for card in hand]
+            score = hand_eval.evaluate(ints)
+            self.assertEqual(score, _reference_score(ints), hand)
+            self.assertEqual(hand_eval.score_category(score), category, hand)
+
+    def test_evaluate_short_hand(self):
+        self.assertEqual(hand_eval.evaluate([0, 5, 9, 13]), hand_eval.NO_HAND)
+
+    @unittest.skipIf(hand_eval.np is None, "numpy not installed")
+    def test_evaluate_batch_matches_score_five(self):
+        for size in (5, 6, 7):
+            hands = self._hands(size, count=500)
+            scores = hand_eval.evaluate_batch(hands)
+            self.assertEqual([int(score) for score in scores], [_reference_score(hand) for hand in hands])
+
+
+# Payloads written by earlier codec versions; they must keep decoding.
+_V1_PAYLOAD = "0RaW-0RR9f0000A000011O*WuECUHAAp!~;{s9000RkQxt47T$;M_^rL`Wg46k7`b"
+_V2_PAYLOAD = "0s#f;0RR9f0000A00001{}s(!2LJ#701E>NCm{j~8~y<R009CX8mmUlE8yHo*hEMns}x%c00"
+
+
+class StateCodecTests(SimpleTestCase):
+    def _state(self):
+        return {
+            "hand_id": 987654321,
+            "deck": {"seed": 123456789, "cursor": 11},
+            "player": {"name": "You", "hand": [10, 27], "stack": 490, "folded": False, "all_in": False},
+            "bots": [
+                {"name": "Bot 1", "hand": [30, 26], "stack": 510, "folded": True, "all_in": False},
+                {"name": "Bot 2", "hand": [42, 11], "stack": 500, "folded": False, "all_in": False},
+            ],
+            "community": [9, 39, 33],
+            "street": "flop",
+            "pot": 40,
+            "pending_call": 10,
+            "raise_done": True,
+            "player_first": False,
+            "opening_done": True,
+            "log": ["New hand started.", "Bot 1 folds."],
+            "log_offset": 0,
+            "log_saved": 0,
+            "street_equity": {
+                "key": [3, 1],
+                "hero": {"win_prob": 0.1425, "low": 0.125, "high": 0.15625, "samples": 1000, "source": "monte_carlo"},
+                "bots": [None, 0.4525],
+            },
+            "last_advice": None,
+        }
+
+    def test_round_trip(self):
+        original = self._state()
+        self.assertEqual(state_codec.decode(state_codec.encode(original)), original)
+
+    def test_reencode_is_byte_stable(self):
+        payload = state_codec.encode(self._state())
+        self.assertEqual(state_codec.encode(state_codec.decode(payload)), payload)
+        for legacy in (_V1_PAYLOAD, _V2_PAYLOAD):
+            reencoded = state_codec.encode(state_codec.decode(legacy))
+            self.assertEqual(state_codec.encode(state_codec.decode(reencoded)), reencoded)
+
+    def test_hand_states_are_not_stored(self):
+        original = self._state()
+        original["player"]["hs"] = [5, 1, 0, 0, 0, 0]
+        self.assertNotIn("hs", state_codec.decode(state_codec.encode(original))["player"])
+
+    def test_decodes_v1_list_deck(self):
+        decoded = state_codec.decode(_V1_PAYLOAD)
+        self.assertEqual(decoded["deck"], [5, 17, 30, 44])
+        self.assertEqual(decoded["community"], [9, 39, 33])
+        self.assertEqual(decoded["player"]["hand"], [10, 27])
+        self.assertTrue(decoded["bots"][0]["folded"])
+        self.assertEqual(decoded["log"], ["New hand started.", "Bot 1 folds."])
+        self.assertNotIn("street_equity", decoded)
+
+    def test_decodes_v2_seeded_deck(self):
+        decoded = state_codec.decode(_V2_PAYLOAD)
+        self.assertEqual(decoded["deck"], {"seed": 123456789, "cursor": 11})
+        self.assertEqual((decoded["street"], decoded["pot"], decoded["pending_call"]), ("flop", 40, 10))
+        self.assertTrue(decoded["raise_done"])
+
+    def test_unknown_version_is_none(self):
+        data = bytearray(base64.b85decode(state_codec.encode(self._state())))
+        data[0] = state_codec.VERSION + 1
+        self.assertIsNone(state_codec.decode(base64.b85encode(bytes(data)).decode("ascii")))
+
+    def test_load_legacy_dict_session(self):
+        legacy = {
+            "deck": ["2C", "3D"],
+            "player": {"name": "You", "hand": ["AS", "KD"], "stack": 500},
+            "bots": [{"name": "Bot 1", "hand": ["QH", "JC"], "stack": 500}],
+            "community": ["TS", "9S", "8S"],
+            "street": "flop",
+            "pot": 20,
+            "log": [],
+        }
+        loaded = state.load({"game_state": legacy})
+        self.assertEqual(loaded["player"]["hand"], state_codec.cards.encode(["AS", "KD"]))
+        self.assertEqual(loaded["community"], state_codec.cards.encode(["TS", "9S", "8S"]))
+        self.assertIn("hand_id", loaded)
+        self.assertEqual(state_codec.decode(state_codec.encode(loaded))["deck"], loaded["deck"])
+
+    def test_hand_id_does_not_reveal_the_deck(self):
+        fresh = state.new_hand()
+        self.assertNotEqual(fresh["hand_id"], fresh["deck"]["seed"])
+        leaked = dict(fresh, hand_id=fresh["deck"]["seed"])  # as sessions before the fix stored it
+        loaded = state.load({"game_state": state_codec.encode(leaked)})
+        self.assertNotEqual(loaded["hand_id"], fresh["deck"]["seed"])
+
+
+class DeltaTests(SimpleTestCase):
+    def setUp(self):
+        self.before = state.to_client(state.new_hand(seed=7))
+        self.before["last_advice"] = {"win_prob": 31.5, "message": "Playable equity.", "ai_note": "AI tip pending..."}
+
+    def _assert_round_trip(self, after):
+        patch = delta.diff(self.before, after)
+        self.assertEqual(delta.apply(copy.deepcopy(self.before), patch), after)
+        return patch
+
+    def test_unchanged_is_empty(self):
+        self.assertEqual(delta.diff(self.before, copy.deepcopy(self.before)), {})
+
+    def test_board_cards_append(self):
+        after = copy.deepcopy(self.before)
+        after["community"] = after["community"] + ["2H", "6D", "9S"]
+        self.assertEqual(self._assert_round_trip(after)["community"], {"$append": ["2H", "6D", "9S"]})
+
+    def test_bot_reveal_appends_hand(self):
+        after = copy.deepcopy(self.before)
+        after["bots"][2]["hand"] = ["5C", "AS"]
+        patch = self._assert_round_trip(after)
+        self.assertEqual(patch["bots"], {"$items": {"2": {"hand": {"$append": ["5C", "AS"]}}}})
+
+    def test_bot_change_patches_items(self):
+        after = copy.deepcopy(self.before)
+        after["bots"][0]["folded"] = True
+        after["bots"][3]["stack"] -= 20
+        patch = self._assert_round_trip(after)
+        self.assertEqual(set(patch["bots"]["$items"]), {"0", "3"})
+
+    def test_advice_cleared_to_none(self):
+        after = copy.deepcopy(self.before)
+        after["last_advice"] = None
+        self._assert_round_trip(after)
+
+    def test_advice_set_and_key_removed(self):
+        self.before["last_advice"] = None
+        after = copy.deepcopy(self.before)
+        after["last_advice"] = {"win_prob": 12.0, "message": "Low equity."}
+        del after["pending_call"]
+        patch = self._assert_round_trip(after)
+        self.assertEqual(patch["last_advice"], {"$replace": after["last_advice"]})
+        self.assertIsNone(patch["pending_call"])
+
+
+class TipInflightTests(SimpleTestCase):
+    def test_follower_replays_then_tails_fragments(self):
+        pending, leader = tip_cache.claim("tip-test:follow")
+        self.assertTrue(leader)
+        pending.publish("Call")
+
+        def lead():
+            for fragment in (" here", " now."):
+                time.sleep(0.02)
+                pending.publish(fragment)
+            tip_cache.resolve("tip-test:follow", pending, "Call here now.")
+
+        async def follow():
+            return [fragment async for fragment in pending.follow()]
+
+        thread = threading.Thread(target=lead)
+        thread.start()
+        self.assertEqual(async_to_sync(follow)(), ["Call", " here", " now."])
+        thread.join()
+        again, leader = tip_cache.claim("tip-test:follow")
+        self.assertTrue(leader)  # resolved: the next caller leads
+        tip_cache.resolve("tip-test:follow", again, None)
+
+
+class BackendRankingTests(SimpleTestCase):
+    def test_failures_rank_behind_measured_backends(self):
+        failing = llm_router.Backend("http://a/api/generate", "fast-fail")
+        working = llm_router.Backend("http://b/api/generate", "slow")
+        working.latencies.extend([0.8, 0.9, 1.0])
+        for _ in range(3):
+            failing.penalize(10.0)
+        self.assertEqual(sorted([failing, working], key=llm_router.Backend.expected), [working, failing])
+
+
+def _truncating_backend():
+    """Endpoint of a one-shot server that starts a chunked tip and hangs up mid-chunk."""
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def serve():
+        conn, _addr = server.accept()
+        with conn, server:
+            conn.recv(65536)
+            line = b'{"response":"Call","done":false}\n'
+            conn.sendall(
+                b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                + b"%x\r\n%s\r\n" % (len(line), line)
+                + b"64\r\n{\"response\":"  # announces 100 bytes, sends 12
+            )
+
+    threading.Thread(target=serve, daemon=True).start()
+    return f"http://127.0.0.1:{server.getsockname()[1]}/api/generate"
+
+
+class TruncatedBackendTests(SimpleTestCase):
+    def test_client_generate_returns_none(self):
+        self.assertIsNone(llm.run(llm.AsyncOllamaClient(_truncating_backend(), timeout=5).generate("tip?", "m")))
+
+    def test_router_counts_truncation_as_failure(self):
+        endpoint = _truncating_backend()
+        with override_settings(LLM_BACKENDS=[(endpoint, "m")], LLM_DEADLINE=5):
+            llm_router.reset()
+            try:
+                self.assertEqual(llm.query_ollama("tip?"), "Call")
+                (backend,) = llm_router.backends()
+                self.assertEqual(backend.failures, 1)
+                self.assertEqual(breaker.stats()["circuits"][endpoint]["failures"], 1)
+            finally:
+                llm_router.reset()
+
+
+class SelfPlayTests(SimpleTestCase):
+    def test_seeded_runs_give_the_same_report(self):
+        reports = [selfplay.run(12, seed=42) for _ in range(2)]
+        for report in reports:
+            del report["seconds"], report["hands_per_sec"]
+        self.assertEqual(reports[0], reports[1])
+        self.assertEqual(reports[0]["hands"], 12)
+
+    def test_seeded_sampling_repeats(self):
+        seats = [([48, 49], 3, (0.45, 0.7)), ([0, 5], 1, ())]
+        runs = []
+        for _ in range(2):
+            simulation.seed(7)
+            try:
+                runs.append(
+                    simulation.multi_seat_equity(seats, [4, 17, 30], iterations=3000, budget_ms=1, use_cache=False)
+                )
+            finally:
+                simulation.seed(None)
+        self.assertEqual(runs[0], runs[1])
+        self.assertGreaterEqual(runs[0][1]["samples"], 3000)  # a seeded run ignores the time budget
+
+
+class SimulationTests(SimpleTestCase):
+    def setUp(self):
+        simulation.seed(11)
+        self.addCleanup(simulation.seed, None)
+
+    @unittest.skipIf(simulation.np is None, "numpy not installed")
+    def test_batched_agrees_with_loop(self):
+        hole, board = [48, 49], [4, 17, 30]
+        base_deck = cards.remaining_deck(hole + board)
+        batched = simulation._simulate_batched(hole, board, 2, 20000, base_deck, simulation._rng())
+        looped = simulation._simulate_loop(hole, board, 2, 20000, base_deck, random.Random(11))
+        self.assertEqual(batched[2], 20000)
+        self.assertAlmostEqual(
+            (batched[0] + batched[1] / 2) / batched[2], (looped[0] + looped[1] / 2) / looped[2], delta=0.02
+        )
+
+    def test_exact_matches_monte_carlo(self):
+        hole, board = [48, 49], [4, 17, 30, 35]  # AA on 2S 6H 9D TC
+        for opponents in (1, 2):
+            exact = simulation.exact_win_prob(hole, board, opponents)
+            sampled = simulation.estimate_win_prob(
+                hole, board, opponents, iterations=20000, exact_cap=0, preflop_table=False
+            )
+            self.assertAlmostEqual(exact, sampled, delta=0.02)
+        details = simulation.estimate_win_prob(hole, board, 1, with_details=True)
+        self.assertEqual((details["source"], details["low"]), ("exact", details["high"]))
+
+    def test_disjoint_pairs_counts_holdings_without_shared_cards(self):
+        holdings = random.Random(3).sample(list(itertools.combinations(range(10), 2)), 25)
+        brute = sum(1 for first, second in itertools.combinations(holdings, 2) if not set(first) & set(second))
+        self.assertEqual(simulation._disjoint_pairs(holdings), brute)
+
+    def test_preflop_table_matches_monte_carlo(self):
+        self.assertEqual(len(preflop.load_table()["equity"]), 169)
+        for hole in ([48, 49], [20, 1]):  # AA, 7 2 offsuit
+            table = simulation.estimate_win_prob(hole, [], 2, with_details=True)
+            sampled = simulation.estimate_win_prob(hole, [], 2, iterations=20000, preflop_table=False)
+            self.assertEqual(table["source"], "table")
+            self.assertAlmostEqual(table["win_prob"], sampled, delta=0.02)
+
+    def test_parallel_workers_split_the_iterations(self):
+        self.addCleanup(simulation.shutdown_pool)
+        hole, board = [48, 49], [4, 17, 30, 35]
+        details = simulation.estimate_win_prob(
+            hole, board, 1, iterations=8000, exact_cap=0, workers=2, with_details=True
+        )
+        self.assertEqual(details["samples"], 8000)
+        self.assertAlmostEqual(details["win_prob"], simulation.exact_win_prob(hole, board, 1), delta=0.02)
+
+    def test_wilson_interval_stops_clear_spots_early(self):
+        quads = simulation.adaptive_win_prob([48, 49], [50, 51, 0], 2, thresholds=(0.5,), max_iterations=20000)
+        self.assertEqual(quads["samples"], simulation.ADAPTIVE_CHUNK)
+        self.assertGreater(quads["low"], 0.5)
+        # Thresholds around the spot's own equity (about 0.716) never all clear, so it samples to the cap.
+        thresholds = (0.70, 0.716, 0.73)
+        close = simulation.adaptive_win_prob([48, 49], [4, 17, 30], 2, thresholds=thresholds, max_iterations=4000)
+        self.assertEqual(close["samples"], 4000)
+        self.assertFalse(simulation.is_decisive(close, thresholds))
+
+    def test_budget_ms_bounds_sampling_time(self):
+        simulation.seed(None)  # a seeded run ignores time budgets
+        started = time.perf_counter()
+        details = simulation.estimate_win_prob(
+            [48, 49], [4, 17, 30], 4, iterations=None, budget_ms=50, with_details=True
+        )
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertGreaterEqual(details["samples"], simulation.ADAPTIVE_CHUNK)
+        capped = simulation.estimate_win_prob(
+            [48, 49], [4, 17, 30], 4, iterations=2000, budget_ms=10000, with_details=True
+        )
+        self.assertEqual(capped["samples"], 2000)
+
+    def test_multi_seat_matches_per_seat_estimates(self):
+        board = [4, 17, 30]
+        seats = [([48, 49], 3, ()), ([0, 5], 1, ()), ([40, 44], 2, ())]
+        shared = simulation.multi_seat_equity(seats, board, iterations=20000, use_cache=False)
+        for (hole, opponents, _thresholds), estimate in zip(seats, shared):
+            alone = simulation.estimate_win_prob(hole, board, opponents, iterations=20000, exact_cap=0)
+            self.assertGreaterEqual(estimate["samples"], 20000)
+            self.assertAlmostEqual(estimate["win_prob"], alone, delta=0.02)
+
+
+class EquityCacheTests(SimpleTestCase):
+    def test_suit_isomorphic_spots_share_a_key(self):
+        spade_flush = equity_cache.canonical_spot(["AS", "KS"], ["QS", "JH", "2D"], 2)
+        heart_flush = equity_cache.canonical_spot(["KH", "AH"], ["2C", "QH", "JS"], 2)
+        offsuit = equity_cache.canonical_spot(["AS", "KH"], ["QS", "JH", "2D"], 2)
+        self.assertEqual(spade_flush, heart_flush)
+        self.assertNotEqual(spade_flush, offsuit)
+        self.assertNotEqual(spade_flush, equity_cache.canonical_spot(["AS", "KS"], ["QS", "JH", "2D"], 3))
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = equity_cache.LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (3, 1))
+
+    @override_settings(CACHES={"equity": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_django_backend_reads_through_the_shared_cache(self):
+        writer = equity_cache.DjangoCacheBackend("equity")
+        reader = equity_cache.DjangoCacheBackend("equity")  # another worker: empty local LRU
+        key = equity_cache.spot_key(equity_cache.canonical_spot(["AS", "KS"], [], 1), 400)
+        self.assertIsNone(reader.get(key))
+        writer.set(key, {"win_prob": 0.67})
+        self.assertEqual(reader.get(key), {"win_prob": 0.67})
+        self.assertEqual(len(reader.local), 1)  # later reads skip the shared cache
+        self.assertEqual((reader.stats()["hits"], reader.stats()["misses"]), (1, 1))
+        writer.clear()
+
+
+class HandStateTests(SimpleTestCase):
+    def test_incremental_state_matches_evaluate(self):
+        rng = random.Random(5)
+        for _ in range(200):
+            dealt = rng.sample(range(52), 7)
+            hs = hand_state.HandState(dealt[:2])
+            for start, end in ((2, 5), (5, 6), (6, 7)):  # flop, turn, river
+                hs.extend(dealt[start:end])
+                self.assertEqual(hs.best, hand_eval.evaluate(dealt[:end]))
+            restored = hand_state.HandState.from_list(hs.to_list())
+            self.assertEqual((restored.best, restored.rank_counts), (hs.best, hs.rank_counts))
+
+    def test_extend_seats_rebuilds_a_stale_memo(self):
+        seats = [{"hand": [48, 49]}, {"hand": [0, 5], "hs": [9, 0, 0, 0, 0, 0]}]
+        hand_state.extend_seats(seats, [], [4, 17, 30])
+        for seat in seats:
+            self.assertEqual(
+                hand_state.for_seat(seat, [4, 17, 30]).best, hand_eval.evaluate(seat["hand"] + [4, 17, 30])
+            )
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_measure_reports_per_call_timings(self):
+        result = benchmarks.measure(lambda: sum(range(100)), 50)
+        self.assertEqual(result["calls"], 50)
+        self.assertLessEqual(result["min_us"], result["median_us"])
+        self.assertLessEqual(result["median_us"], result["p95_us"])
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {"results": {"slower": {"median_us": 100}, "faster": {"median_us": 100}, "same": {"median_us": 100}}}
+        report = {
+            "results": {
+                "slower": {"median_us": 130},
+                "faster": {"median_us": 50},
+                "same": {"median_us": 105},
+                "added": {"median_us": 10},
+            }
+        }
+        statuses = {row["name"]: row["status"] for row in benchmarks.compare(report, baseline, tolerance=0.15)}
+        self.assertEqual(statuses, {"slower": "regression", "faster": "improved", "same": "ok", "added": "new"})
+
+
+class TimingTests(SimpleTestCase):
+    def test_spans_are_collected_only_inside_a_request(self):
+        traced = timing.timed("test.work")(lambda: 42)
+        self.assertEqual(traced(), 42)  # no request: nothing recorded
+        token = timing.start()
+        traced()
+        traced()
+        with timing.span("test.block"):
+            pass
+        spans = timing.finish(token)
+        self.assertEqual((spans["test.work"][1], spans["test.block"][1]), (2, 1))
+        self.assertIn("test-work;dur=", timing.server_timing(spans))
+        self.assertEqual(timing.stats()["test.work"]["requests"], 1)
+
+    @override_settings(PERF_TIMING=True)
+    def test_middleware_sets_server_timing_header(self):
+        middleware = TimingMiddleware(lambda request: HttpResponse("ok"))
+        response = middleware(RequestFactory().get("/"))
+        self.assertRegex(response["Server-Timing"], r'^total;dur=[0-9.]+;desc="total x1"$')
+
+
+class SeededDeckTests(SimpleTestCase):
+    def test_draw_follows_the_seeded_order(self):
+        deck = cards.seeded_deck(99)
+        dealt = cards.draw(deck, 2) + cards.draw(deck, 3)
+        self.assertEqual(dealt, list(cards.deck_order(99)[:5]))
+        self.assertEqual(deck, {"seed": 99, "cursor": 5})
+        self.assertEqual(cards.cards_left(deck), 47)
+        self.assertEqual(cards.undealt(deck), sorted(set(range(52)) - set(dealt)))
+        self.assertEqual(cards.draw(cards.seeded_deck(99), 5), dealt)  # same seed, same deal
+
+    def test_draw_stops_at_the_end_of_the_deck(self):
+        deck = {"seed": 1, "cursor": 50}
+        self.assertEqual(len(cards.draw(deck, 5)), 2)
+        self.assertEqual((cards.cards_left(deck), cards.undealt(deck), cards.draw(deck, 1)), (0, [], []))
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("history-test")
+        self.state = {"hand_id": 77, "street": "flop", "player": {"folded": False}, "log": [], "log_offset": 0}
+
+    def _play(self, count):
+        start = self.state["log_offset"] + len(self.state["log"])
+        self.state["log"] += [f"line {seq}" for seq in range(start, start + count)]
+        history.flush(self.user, self.state)
+        state.trim_log(self.state)
+
+    def test_flush_buffers_until_the_hand_ends(self):
+        self._play(3)
+        self.assertEqual(self.user.hand_events.count(), 0)
+        page = history.events(self.user, 77, state=self.state)
+        self.assertEqual([event["text"] for event in page["events"]], ["line 0", "line 1", "line 2"])
+        self.state["street"] = "hand_over"
+        self._play(1)
+        self.assertEqual(list(self.user.hand_events.values_list("seq", flat=True)), [0, 1, 2, 3])
+        self.assertEqual(history.flush(self.user, self.state, force=True), 0)  # nothing left to write
+
+    def test_log_since_reads_trimmed_lines_from_the_store(self):
+        self._play(history.FLUSH_AT + 5)  # a long hand: flushed mid-hand, then trimmed
+        self.assertEqual(self.state["log_offset"], 5)
+        self.assertEqual(history.log_since(self.user, self.state, 2)["lines"][:3], ["line 2", "line 3", "line 4"])
+        recent = history.log_since(self.user, self.state, history.FLUSH_AT + 3)
+        self.assertEqual(recent, {"offset": history.FLUSH_AT + 3, "lines": ["line 23", "line 24"]})
+
+
+class StateStoreTests(SimpleTestCase):
+    def _request(self):
+        return SimpleNamespace(session={}, user=SimpleNamespace(pk=4242))
+
+    def _assert_skips_unchanged(self, store):
+        request = self._request()
+        game = state.new_hand(seed=3)
+        self.assertTrue(store.save(request, game))
+        loaded = store.load(request)
+        self.assertFalse(store.save(request, loaded))  # unchanged: no write, no version bump
+        self.assertEqual(loaded["version"], 1)
+        loaded["pot"] += 10
+        self.assertTrue(store.save(request, loaded))
+        self.assertEqual(store.load(request)["pot"], loaded["pot"])
+        return request
+
+    def test_session_store_skips_unchanged_writes(self):
+        self._assert_skips_unchanged(state_store.SessionStore())
+
+    def test_cache_store_skips_unchanged_writes(self):
+        store = state_store.CacheStore()
+        request = self._assert_skips_unchanged(store)
+        self.assertEqual(request.session, {})  # the session row is never written
+        store.cache.delete(store._key(request))
+
+
+class TipPrefetchTests(SimpleTestCase):
+    def setUp(self):
+        executor = ThreadPoolExecutor(max_workers=1)  # one job runs, the rest wait
+        self.addCleanup(executor.shutdown)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)  # cleanups run last-in first-out
+        patches = (
+            mock.patch.object(tip_prefetch, "_pool", lambda workers: executor),
+            mock.patch.object(tip_prefetch, "_run", lambda key, spot: self.release.wait(5)),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.game = state.new_hand(seed=21)
+
+    def _submit(self, user_id, win_prob):
+        with tip_prefetch.owner(user_id):
+            return tip_prefetch.submit(self.game, win_prob, {"action": "call"})
+
+    @override_settings(TIP_PREFETCH_PER_USER=1)
+    def test_per_user_limit_skips_extra_jobs(self):
+        before = tip_prefetch.stats()
+        self.assertTrue(self._submit("limit-a", 0.1))
+        self.assertFalse(self._submit("limit-a", 0.1))  # same spot already queued
+        self.assertFalse(self._submit("limit-a", 0.5))  # first job is running
+        self.assertTrue(self._submit("limit-b", 0.5))  # other users are not held back
+        after = tip_prefetch.stats()
+        self.assertEqual(after.get("skipped_limit", 0) - before.get("skipped_limit", 0), 1)
+
+    def test_newer_spot_cancels_a_waiting_job(self):
+        before = tip_prefetch.stats()
+        self.assertTrue(self._submit("cancel-a", 0.1))  # starts running
+        self.assertTrue(self._submit("cancel-a", 0.5))  # waits behind it
+        waiting = tip_prefetch._latest["cancel-a"][1]
+        self.assertTrue(self._submit("cancel-a", 0.9))  # supersedes the waiting one
+        self.assertTrue(waiting.cancelled())
+        after = tip_prefetch.stats()
+        self.assertEqual(after.get("cancelled", 0) - before.get("cancelled", 0), 1)
+
+
+@override_settings(LLM_BREAKER_THRESHOLD=2, LLM_BREAKER_BACKOFF=0.05)
+class BreakerTests(SimpleTestCase):
+    def _open(self, endpoint):
+        breaker.record_failure(endpoint)
+        self.assertTrue(breaker.allow(endpoint))  # one failure short of the threshold
+        breaker.record_failure(endpoint)
+        self.assertEqual(breaker.stats()["circuits"][endpoint]["state"], "open")
+
+    def test_probe_closes_the_circuit_after_the_backoff(self):
+        endpoint = "http://breaker-close/api/generate"
+        self._open(endpoint)
+        with mock.patch.object(breaker, "probe", return_value=True) as probe:
+            self.assertFalse(breaker.allow(endpoint))  # open: rejected without probing
+            probe.assert_not_called()
+            time.sleep(0.06)
+            self.assertTrue(breaker.allow(endpoint))  # half-open: the probe answers
+        self.assertEqual(breaker.stats()["circuits"][endpoint]["state"], "closed")
+
+    def test_failed_probe_doubles_the_backoff(self):
+        endpoint = "http://breaker-backoff/api/generate"
+        self._open(endpoint)
+        time.sleep(0.06)
+        with mock.patch.object(breaker, "probe", return_value=False):
+            self.assertFalse(breaker.allow(endpoint))
+            self.assertFalse(breaker.allow(endpoint))  # another worker: the probe lock is held
+        circuit = breaker.stats()["circuits"][endpoint]
+        self.assertEqual((circuit["state"], circuit["backoff"]), ("open", 0.1))
+        breaker.record_success(endpoint)
+        self.assertEqual(breaker.stats()["circuits"][endpoint]["state"], "closed")
@@ -9,6 +9,8 @@ urlpatterns = [
     path("play/", views.play, name="play"),
     path("play/new/", views.new_hand, name="new_hand"),
     path("play/action/<str:move>/", views.player_action, name="player_action"),
+    path("play/history/", views.play_history, name="play_history"),
     path("collect/", views.collect_chips, name="collect_chips"),
     path("ai-tip/", views.ai_tip, name="ai_tip"),
+    path("perf/stats/", views.perf_stats, name="perf_stats"),
 ]
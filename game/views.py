@@ -1,11 +1,16 @@
+import json
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
 
 from .forms import SignUpForm
-from .services import engine, state as state_svc, simulation, policy, llm, advice, hand_eval
+from .services import engine, state as state_svc, simulation, policy, llm, advice, delta, hand_state, history
+from .services import breaker, llm_router, state_store, timing, tip_cache, tip_prefetch
 
 
 def home(request):
@@ -28,9 +33,15 @@ def signup(request):
     return render(request, "registration/signup.html", {"form": form})
 
 
+def _save_state(request, state):
+    """Flush buffered log lines to the history store when due, then save the trimmed state."""
+    history.flush(request.user, state)
+    state_store.save(request, state)
+
+
 @login_required
 def dashboard(request):
-    state = state_svc.load(request.session)
+    state = state_store.load(request)
     summary = None
     if state:
         summary = {
@@ -44,18 +55,20 @@ def dashboard(request):
 
 @login_required
 def play(request):
-    state = state_svc.load(request.session)
+    state = state_store.load(request)
     if state is None or state.get("street") == "hand_over":
         state = state_svc.new_game()
-    engine.maybe_opening_bots(state)
-    engine.ensure_advice(state)
-    state_svc.save(request.session, state)
+    with tip_prefetch.owner(request.user.pk):
+        engine.maybe_opening_bots(state)
+        engine.ensure_advice(state)
+    _save_state(request, state)
     is_over = state.get("street") == "hand_over" or state.get("player", {}).get("folded")
     return render(
         request,
         "game/play.html",
         {
             "state": state,
+            "client_state": state_svc.to_client(state),
             "call_amount": engine.CALL_AMOUNT,
             "raise_amount": engine.RAISE_AMOUNT,
             "is_over": is_over,
@@ -65,31 +78,54 @@ def play(request):
 
 @login_required
 def new_hand(request):
-    prev = state_svc.load(request.session)
+    prev = state_store.load(request)
+    if prev:
+        history.flush(request.user, prev, force=True)  # the abandoned hand's buffered lines
     state = state_svc.new_hand(prev_state=prev)
     # If bots are set to start, let them act once before rendering play.
-    engine.maybe_opening_bots(state)
-    engine.ensure_advice(state)
-    state_svc.save(request.session, state)
+    with tip_prefetch.owner(request.user.pk):
+        engine.maybe_opening_bots(state)
+        engine.ensure_advice(state)
+    _save_state(request, state)
     return redirect("play")
 
 
 @login_required
 def player_action(request, move):
-    state = state_svc.load(request.session) or state_svc.new_game()
-    state, events = engine.apply_player_move(state, move)
-    state_svc.save(request.session, state)
+    state = state_store.load(request) or state_svc.new_game()
+    before = state_svc.to_client(state)
+    with tip_prefetch.owner(request.user.pk):
+        state, events = engine.apply_player_move(state, move)
+    history.flush(request.user, state)
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
-        return JsonResponse({"events": events, "state": state})
+        # Only log lines the client has not seen (?since=<seq>), not the whole log.
+        try:
+            since = int(request.GET.get("since", state.get("log_offset", 0)))
+        except ValueError:
+            since = state.get("log_offset", 0)
+        log = history.log_since(request.user, state, since)
+        state_store.save(request, state)
+        after = state_svc.to_client(state)
+        for view in (before, after):
+            view.pop("log", None)
+        payload = {"events": events, "log": log, "version": after["version"]}
+        if request.GET.get("v") == str(before["version"]):
+            # Client holds the pre-move state: send only what changed.
+            payload["base"] = before["version"]
+            payload["patch"] = delta.diff(before, after)
+        else:
+            payload["state"] = after
+        return JsonResponse(payload)
+    state_store.save(request, state)
     return redirect("play")
 
 
 @login_required
 def collect_chips(request):
-    state = state_svc.load(request.session) or state_svc.new_game()
+    state = state_store.load(request) or state_svc.new_game()
     state["player"]["stack"] += 100
     # Don't clutter hand log with bonus info; keep this quiet.
-    state_svc.save(request.session, state)
+    _save_state(request, state)
     return redirect("dashboard")
 
 
@@ -99,12 +135,9 @@ def logout_get(request):
     return redirect("home")
 
 
-@login_required
-def ai_tip(request):
-    """
-    Return only the LLM tip without blocking the main gameplay flow.
-    """
-    state = state_svc.load(request.session)
+def _tip_inputs(request):
+    """Load the hand for ai_tip: (state, win_prob, policy_hint), or an error response."""
+    state = state_store.load(request)
     if not state:
         return JsonResponse({"ai_note": None}, status=400)
     if state.get("street") == "hand_over" or state.get("player", {}).get("folded"):
@@ -114,38 +147,132 @@ def ai_tip(request):
     win_prob = state.get("last_equity")
     if win_prob is None:
         active_bots = sum(1 for bot in state.get("bots", []) if not bot.get("folded"))
-        win_prob = simulation.estimate_win_prob(
+        estimate = simulation.cached_equity(
             state.get("player", {}).get("hand", []),
             state.get("community", []),
             num_opponents=active_bots,
             iterations=engine.ADVICE_ITERATIONS,
-            deck=state.get("deck"),
+            thresholds=engine.ADVICE_THRESHOLDS,
+            budget_ms=engine.ADVICE_BUDGET_MS,
         )
+        win_prob = estimate["win_prob"]
         state["last_equity"] = win_prob
+        state["last_equity_samples"] = estimate["samples"]
     policy_hint = state.get("last_policy") or policy.recommend(state, win_prob)
+    return state, win_prob, policy_hint
+
+
+def _store_tip(request, state, win_prob, policy_hint, note, save_session=False):
+    """
+    Update advice in the stored state so the UI renders the real tip on next refresh.
+    save_session: also write the session now (a streamed response has already been
+    through SessionMiddleware by the time the tip is complete).
+    """
+    if not state.get("last_advice"):
+        best_score = hand_state.for_seat(state.get("player", {}), state.get("community", []) or []).best
+        state["last_advice"] = {
+            "win_prob": round(win_prob * 100, 1),
+            "suggested_action": policy_hint["action"],
+            "message": "",
+            "explanation": advice.hand_rank_label(best_score),
+            "ai_note": note,
+        }
+    else:
+        state["last_advice"]["ai_note"] = note
+        base_expl = state["last_advice"].get("explanation", "") or ""
+        if "AI guidance:" in base_expl:
+            base_expl = base_expl.split("AI guidance:")[0].strip()
+        state["last_advice"]["explanation"] = (base_expl + f" AI guidance: {note}").strip()
+    if state_store.save(request, state) and save_session and request.session.modified:
+        request.session.save()
+
+
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
 
-    note = llm.ai_guidance(state, win_prob, policy_hint)
+
+async def _stream_tip(request, state, win_prob, policy_hint):
+    parts = []
+    async for fragment in llm.stream_guidance(state, win_prob, policy_hint):
+        parts.append(fragment)
+        yield _sse({"token": fragment})
+    note = "".join(parts).strip()
     if note:
-        # Update advice in session so UI renders the real tip on next refresh.
-        if not state.get("last_advice"):
-            best_score = hand_eval.evaluate_best(
-                (state.get("player", {}).get("hand", []) or []) + (state.get("community", []) or [])
-            )
-            state["last_advice"] = {
-                "win_prob": round(win_prob * 100, 1),
-                "suggested_action": policy_hint["action"],
-                "message": "",
-                "explanation": advice.hand_rank_label(best_score),
-                "ai_note": note,
-            }
-        else:
-            state["last_advice"]["ai_note"] = note
-            base_expl = state["last_advice"].get("explanation", "") or ""
-            if "AI guidance:" in base_expl:
-                base_expl = base_expl.split("AI guidance:")[0].strip()
-            state["last_advice"]["explanation"] = (base_expl + f" AI guidance: {note}").strip()
-        state_svc.save(request.session, state)
+        await sync_to_async(_store_tip)(request, state, win_prob, policy_hint, note, save_session=True)
+        yield _sse({"ai_note": note}, event="done")
+    else:
+        yield _sse(await _fallback_tip(request, state, win_prob, policy_hint), event="done")
+
+
+async def _fallback_tip(request, state, win_prob, policy_hint):
+    """No model answered before the deadline: store and return the policy template tip."""
+    note = llm.template_tip(state, win_prob, policy_hint)
+    await sync_to_async(_store_tip)(request, state, win_prob, policy_hint, note, save_session=True)
+    return {"ai_note": note, "fallback": True}
+
+
+@login_required
+async def ai_tip(request):
+    """
+    Return only the LLM tip without blocking the main gameplay flow. Async: the
+    worker is free while the model runs (serve via asgi.py). With Accept: text/event-stream the tip is relayed token by token
+    as server-sent events, ending with a "done" event carrying the full note.
+    """
+    inputs = await sync_to_async(_tip_inputs)(request)
+    if isinstance(inputs, JsonResponse):
+        return inputs
+    state, win_prob, policy_hint = inputs
+
+    if "text/event-stream" in request.headers.get("accept", ""):
+        response = StreamingHttpResponse(
+            _stream_tip(request, state, win_prob, policy_hint), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # let nginx pass events through unbuffered
+        return response
+
+    note = await llm.ai_guidance_async(state, win_prob, policy_hint)
+    if note:
+        await sync_to_async(_store_tip)(request, state, win_prob, policy_hint, note)
         return JsonResponse({"ai_note": note})
 
-    # Return a friendly unavailable message to avoid indefinite "pending".
-    return JsonResponse({"ai_note": "AI tip unavailable right now; will retry shortly."}, status=202)
+    return JsonResponse(await _fallback_tip(request, state, win_prob, policy_hint))
+
+
+@login_required
+def perf_stats(request):
+    """Staff-only p50/p95/p99 per timing span over this worker's recent requests."""
+    if not request.user.is_staff:
+        return JsonResponse({"error": "staff only"}, status=403)
+    return JsonResponse(
+        {
+            "enabled": settings.PERF_TIMING,
+            "spans": timing.stats(),
+            "tip_cache": tip_cache.stats(),
+            "tip_prefetch": tip_prefetch.stats(),
+            "llm_breaker": breaker.stats(),
+            "llm_router": llm_router.stats(),
+        }
+    )
+
+
+@login_required
+def play_history(request):
+    """
+    Paginated hand history from the append-only store: ?hand=<id> (default: the
+    current hand), ?after=<seq> and ?limit=<n>.
+    """
+    state = state_store.load(request)
+    try:
+        hand = request.GET.get("hand")
+        after = int(request.GET.get("after", -1))
+        limit = int(request.GET.get("limit", history.PAGE_SIZE))
+        hand_id = int(hand) if hand else None
+    except ValueError:
+        return JsonResponse({"error": "hand, after and limit must be integers"}, status=400)
+    if hand_id is None:
+        if not state:  # no game yet and no hand asked for
+            return JsonResponse({"hand_id": None, "events": [], "next_after": after, "has_more": False})
+        hand_id = state["hand_id"]
+    return JsonResponse(history.events(request.user, hand_id, after=after, limit=limit, state=state))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'game.middleware.TimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -82,6 +84,93 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+#
+# EQUITY_CACHE_URL picks where equity results are shared between workers:
+#   locmem://                 per-process (default, no setup)
+#   file:///var/tmp/pokerface shared by every worker on one host
+#   memcached://127.0.0.1:11211, redis://127.0.0.1:6379/1  shared across hosts
+#     (need pymemcache / redis installed)
+# Set EQUITY_CACHE_BACKEND=memory to skip Django's cache and keep a plain in-process LRU.
+
+EQUITY_CACHE_URL = os.getenv("EQUITY_CACHE_URL", "locmem://")
+_equity_scheme, _, _equity_location = EQUITY_CACHE_URL.partition("://")
+_EQUITY_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "equity": {
+        "BACKEND": _EQUITY_CACHE_BACKENDS[_equity_scheme],
+        "LOCATION": EQUITY_CACHE_URL if _equity_scheme == "redis" else _equity_location or "pokerface-equity",
+        "OPTIONS": {"MAX_ENTRIES": 50000} if _equity_scheme in ("locmem", "file") else {},
+    },
+}
+EQUITY_CACHE_BACKEND = os.getenv("EQUITY_CACHE_BACKEND", "equity")
+EQUITY_CACHE_TTL = int(os.getenv("EQUITY_CACHE_TTL", "86400"))
+
+# Where gameplay state lives (game/services/state_store.py): "session" follows
+# SESSION_ENGINE (db, cached_db or cache); "cache" keeps it in the GAME_STATE_CACHE
+# alias per user so actions never write the session row. Unchanged state is never
+# rewritten in either mode.
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "django.contrib.sessions.backends.db")
+GAME_STATE_STORE = os.getenv("GAME_STATE_STORE", "session")
+GAME_STATE_CACHE = os.getenv("GAME_STATE_CACHE", "default")
+GAME_STATE_TTL = int(os.getenv("GAME_STATE_TTL", str(7 * 24 * 3600)))
+
+# LLM tips are cached per bucketed spot (game/services/tip_cache.py). "memory" keeps a
+# per-process LRU of TIP_CACHE_MAX_ENTRIES; a CACHES alias (e.g. "equity") shares tips
+# across workers and is bounded by that backend.
+TIP_CACHE_BACKEND = os.getenv("TIP_CACHE_BACKEND", "memory")
+TIP_CACHE_TTL = int(os.getenv("TIP_CACHE_TTL", str(6 * 3600)))
+TIP_CACHE_MAX_ENTRIES = int(os.getenv("TIP_CACHE_MAX_ENTRIES", "5000"))
+# engine.ensure_advice queues the tip on a background thread pool as soon as advice is
+# computed (game/services/tip_prefetch.py); /ai-tip/ then collects it from the tip cache.
+TIP_PREFETCH = os.getenv("TIP_PREFETCH", "1") == "1"
+TIP_PREFETCH_WORKERS = int(os.getenv("TIP_PREFETCH_WORKERS", "4"))
+TIP_PREFETCH_MAX_QUEUED = int(os.getenv("TIP_PREFETCH_MAX_QUEUED", "64"))
+TIP_PREFETCH_PER_USER = int(os.getenv("TIP_PREFETCH_PER_USER", "2"))
+# Circuit breaker for the LLM backend (game/services/breaker.py): after
+# LLM_BREAKER_THRESHOLD consecutive failures tips fail fast; GET /api/tags probes the
+# server after LLM_BREAKER_BACKOFF seconds, doubling up to LLM_BREAKER_MAX_BACKOFF.
+# State is kept in the LLM_BREAKER_CACHE alias, so a shared cache shares the circuit.
+LLM_BREAKER_CACHE = os.getenv("LLM_BREAKER_CACHE", "default")
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "3"))
+LLM_BREAKER_BACKOFF = float(os.getenv("LLM_BREAKER_BACKOFF", "5"))
+LLM_BREAKER_MAX_BACKOFF = float(os.getenv("LLM_BREAKER_MAX_BACKOFF", "300"))
+LLM_BREAKER_PROBE_TIMEOUT = float(os.getenv("LLM_BREAKER_PROBE_TIMEOUT", "1"))
+# LLM backends for tips (game/services/llm_router.py): "model@endpoint" entries, comma
+# separated; defaults to OLLAMA_MODEL at OLLAMA_ENDPOINT. The fastest healthy backend
+# is used; LLM_HEDGE=1 also asks the next one once the first passes its p95 latency.
+# With no answer within LLM_DEADLINE seconds the tip falls back to a policy template.
+LLM_BACKENDS = [
+    (endpoint, model)
+    for model, _, endpoint in (entry.strip().partition("@") for entry in os.getenv("OLLAMA_BACKENDS", "").split(","))
+    if model and endpoint
+]
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "10"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+
+# Per-request timing spans (game/services/timing.py): Server-Timing header, optional
+# JSON log line on the "game.timing" logger, and staff stats at /perf/stats/.
+PERF_TIMING = os.getenv("PERF_TIMING", "1" if DEBUG else "0") == "1"
+PERF_TIMING_LOG = os.getenv("PERF_TIMING_LOG", "0") == "1"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"game.timing": {"handlers": ["console"], "level": "INFO", "propagate": False}},
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -19,7 +19,10 @@
   const handStatusEl = document.getElementById("hand-status");
   const initialScript = document.getElementById("initial-state");
   const tableNoticeEl = document.getElementById("table-notice");
-  let lastCounts = { community: 0, log: 0 };
+  let lastCounts = { community: 0 };
+  // Sequence number of the next log line; actions ask the server only for lines from here.
+  let logSeq = 0;
+  let lastLogLine = "";
   let audioCtx = null;
   let currentState = null;
   let aiPending = false;
@@ -115,17 +118,57 @@
     });
   }
 
-  function renderLog(log) {
-    logBox.innerHTML = "";
-    (log || []).forEach((entry) => {
+  function appendLog(lines) {
+    (lines || []).forEach((entry) => {
       const row = document.createElement("div");
       row.className = "small log-entry";
       row.textContent = entry;
       logBox.appendChild(row);
     });
+    if (lines?.length) lastLogLine = lines[lines.length - 1];
     logBox.scrollTop = logBox.scrollHeight;
   }
 
+  function renderLog(log, offset = 0) {
+    logBox.innerHTML = "";
+    appendLog(log);
+    logSeq = offset + (log?.length || 0);
+  }
+
+  function applyPatch(target, patch) {
+    // Mirror of game/services/delta.py apply(): merge patch plus $append/$items/$replace.
+    Object.entries(patch || {}).forEach(([key, value]) => {
+      if (value === null) {
+        delete target[key];
+      } else if (value && typeof value === "object" && !Array.isArray(value)) {
+        if ("$replace" in value) {
+          target[key] = value.$replace;
+        } else if ("$append" in value) {
+          target[key] = (target[key] || []).concat(value.$append);
+        } else if ("$items" in value) {
+          Object.entries(value.$items).forEach(([idx, itemPatch]) => {
+            applyPatch(target[key][Number(idx)], itemPatch);
+          });
+        } else {
+          if (!target[key] || typeof target[key] !== "object") target[key] = {};
+          applyPatch(target[key], value);
+        }
+      } else {
+        target[key] = value;
+      }
+    });
+    return target;
+  }
+
+  function applyLogPatch(patch) {
+    // patch = { offset, lines }: lines starting at seq `offset` that we have not shown yet.
+    if (!patch) return 0;
+    const fresh = (patch.lines || []).slice(Math.max(0, logSeq - patch.offset));
+    appendLog(fresh);
+    logSeq = Math.max(logSeq, patch.offset + (patch.lines?.length || 0));
+    return fresh.length;
+  }
+
   function renderAdvice(advice) {
     if (advice) {
       adviceMsgEl.textContent = advice.message;
@@ -155,7 +198,7 @@
   }
 
   function aiKey(state) {
-    return `${state.street}-${state.community?.length || 0}-${state.log?.length || 0}`;
+    return `${state.street}-${state.community?.length || 0}-${logSeq}`;
   }
 
   function maybeFetchAi(state) {
@@ -177,10 +220,13 @@
     if (aiSpinner) aiSpinner.classList.remove("d-none");
     fetch("/ai-tip/", {
       method: "GET",
-      headers: { "X-Requested-With": "XMLHttpRequest" },
+      headers: { "X-Requested-With": "XMLHttpRequest", Accept: "text/event-stream" },
       credentials: "same-origin",
     })
-      .then((res) => res.json())
+      .then((res) => {
+        const type = res.headers.get("Content-Type") || "";
+        return type.includes("text/event-stream") && res.body ? readTipStream(res) : res.json();
+      })
       .then((data) => {
         aiPending = false;
         if (data?.ai_note && currentState) {
@@ -199,7 +245,38 @@
       });
   }
 
-  function renderState(state) {
+  async function readTipStream(res) {
+    // Server-sent events from /ai-tip/: "token" fragments as the model writes, then a
+    // "done" event with the full note (same shape as the JSON response).
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let streamed = "";
+    let done = null;
+    for (;;) {
+      const { value, done: finished } = await reader.read();
+      if (finished) break;
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split("\n\n");
+      buffer = events.pop();
+      events.forEach((raw) => {
+        const lines = raw.split("\n");
+        const event = (lines.find((l) => l.startsWith("event: ")) || "").slice(7);
+        const dataLine = lines.find((l) => l.startsWith("data: "));
+        if (!dataLine) return;
+        const data = JSON.parse(dataLine.slice(6));
+        if (event === "done") {
+          done = data;
+        } else if (data.token) {
+          streamed += data.token;
+          if (aiNoteText) aiNoteText.textContent = streamed;
+        }
+      });
+    }
+    return done || { ai_note: streamed.trim() || null };
+  }
+
+  function renderState(state, newLines = 0) {
     currentState = state;
     potEl.textContent = state.pot;
     streetEl.textContent = state.street
@@ -218,7 +295,6 @@
       ghosts: Math.max(0, 2 - (state.player?.hand?.length || 0)),
     });
     renderBots(state.bots || [], isOver);
-    renderLog(state.log || []);
     renderAdvice(state.last_advice);
     maybeFetchAi(state);
 
@@ -266,16 +342,15 @@
 
     if (currentCommunity > prevCommunity) {
       playDealSound();
-    } else if ((state.log?.length || 0) > (lastCounts.log || 0)) {
-      const lastMsg = state.log[state.log.length - 1] || "";
-      if (/win|wins|Showdown/i.test(lastMsg)) {
+    } else if (newLines > 0) {
+      if (/win|wins|Showdown/i.test(lastLogLine)) {
         playWinSound();
       } else {
         playClickSound();
       }
     }
 
-    lastCounts = { community: currentCommunity, log: state.log?.length || 0 };
+    lastCounts = { community: currentCommunity };
   }
 
   actionButtons.forEach((btn) => {
@@ -284,9 +359,10 @@
       if (btn.classList.contains("disabled")) return;
       playClickSound();
       setActionsEnabled(false);
-      const beforeLog = lastCounts.log || 0;
+      let newLogCount = 0;
       const url = btn.dataset.hrefOriginal || btn.dataset.href || btn.getAttribute("href");
-      fetch(url, {
+      const version = currentState?.version ?? "";
+      fetch(`${url}?since=${logSeq}&v=${version}`, {
         method: "GET",
         headers: {
           "X-Requested-With": "XMLHttpRequest",
@@ -298,8 +374,15 @@
           return res.json();
         })
         .then((data) => {
-          if (data?.state) {
-            renderState(data.state);
+          let next = null;
+          if (data?.patch && currentState && currentState.version === data.base) {
+            next = applyPatch(currentState, data.patch);
+          } else if (data?.state) {
+            next = data.state;
+          }
+          if (next) {
+            newLogCount = applyLogPatch(data.log);
+            renderState(next, newLogCount);
           }
         })
         .catch(() => {
@@ -310,7 +393,6 @@
         })
         .finally(() => {
           // Simulate bot thinking time based on how many new log lines arrived.
-          const newLogCount = (currentState?.log?.length || 0) - beforeLog;
           const delay = Math.min(1500, 400 + Math.max(newLogCount, 1) * 180);
           setTimeout(() => setActionsEnabled(true), delay);
         });
@@ -327,6 +409,9 @@
   if (initialScript) {
     try {
       const initialState = JSON.parse(initialScript.textContent);
+      // The log ring is rendered once here; later responses carry only new lines.
+      renderLog(initialState.log || [], initialState.log_offset || 0);
+      delete initialState.log;
       renderState(initialState);
     } catch (err) {
       console.error("Failed to load initial state", err);